@@ -11,6 +11,7 @@ from app.admin_bp import admin_bp
 from app.models import Customer, Subscription, SearchLog, PaymentLog, AdminUser, SearchUsage
 from app.utils.subscription_utils import get_subscription_stats
 from app.extensions import db
+from app.services.clip_store import get_clip_store
 
 logger = logging.getLogger(__name__)
 
@@ -88,23 +89,19 @@ def get_system_stats():
     memory = psutil.virtual_memory()
     disk = psutil.disk_usage('/')
     
-    # Calculate clips folder size
-    clips_folder_size = 0
-    clips_path = os.path.join(current_app.root_path, 'static', 'clips')
-    if os.path.exists(clips_path):
-        for path, dirs, files in os.walk(clips_path):
-            for f in files:
-                fp = os.path.join(path, f)
-                clips_folder_size += os.path.getsize(fp)
+    # Clips folder size from the clip store index
+    store = get_clip_store()
+    clip_stats = store.stats() if store else {'clips': 0, 'bytes': 0}
     
     # Convert to MB
-    clips_folder_size = clips_folder_size / (1024 * 1024)
+    clips_folder_size = clip_stats['bytes'] / (1024 * 1024)
     
     return {
         'cpu_percent': cpu_percent,
         'memory_percent': memory.percent,
         'disk_percent': disk.percent,
-        'clips_folder_size': clips_folder_size
+        'clips_folder_size': clips_folder_size,
+        'clips_count': clip_stats['clips']
     }
 
 
@@ -297,16 +294,12 @@ def system_health():
 def clear_clips():
     """Clear all stored audio clips"""
     try:
-        clips_path = os.path.join(current_app.root_path, 'static', 'clips')
-        if os.path.exists(clips_path):
-            for file in os.listdir(clips_path):
-                file_path = os.path.join(clips_path, file)
-                try:
-                    if os.path.isfile(file_path):
-                        os.unlink(file_path)
-                except Exception as e:
-                    logger.error(f"Error deleting {file_path}: {str(e)}")
-        return jsonify({'success': True})
+        store = get_clip_store()
+        if store is None:
+            return jsonify({'success': False, 'error': 'Clip store unavailable'})
+        store.reconcile()
+        removed = store.clear()
+        return jsonify({'success': True, 'removed': removed})
     except Exception as e:
         logger.error(f"Error clearing clips: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
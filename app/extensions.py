@@ -6,6 +6,7 @@ from flask_migrate import Migrate
 from flask_caching import Cache
 from flask_login import LoginManager
 from flask_mail import Mail
+from flask import has_app_context
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
 from urllib.parse import urlparse
@@ -27,6 +28,19 @@ def load_user(user_id):
         return None
     return AdminUser.query.get(int(user_id))
 
+def get_redis_client():
+    """Get the raw Redis client behind the cache.
+
+    Returns None outside an app context or when the cache fell back to a
+    non-Redis backend, so callers can skip their shared tier.
+    """
+    if not has_app_context():
+        return None
+    try:
+        return getattr(cache.cache, '_write_client', None)
+    except Exception:
+        return None
+
 def init_extensions(app):
     """Initialize all Flask extensions."""
     logger.info("Initializing Flask extensions...")
@@ -103,4 +117,4 @@ def init_extensions(app):
     logger.info("Flask extensions initialized successfully")
 
 # Keep existing code but ensure db is properly exported
-__all__ = ['db', 'cache', 'login_manager', 'mail']
+__all__ = ['db', 'cache', 'login_manager', 'mail', 'get_redis_client']
@@ -9,6 +9,7 @@ class SearchLog(db.Model):
     __tablename__ = 'search_logs'
     
     id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.String(32), unique=True)
     query = db.Column(db.String(500), nullable=False)
     token = db.Column(db.String(100))
     ip_address = db.Column(db.String(45))
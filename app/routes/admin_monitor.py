@@ -1,7 +1,16 @@
 """Admin monitoring routes."""
-from flask import Blueprint, render_template, current_app, request, abort
+from flask import Blueprint, render_template, current_app, request, abort, jsonify
 from app.extensions import cache, db
 from app.models import Subscription, Customer
+from app.services.transcript_cache import transcript_cache
+from app.services.youtube_search import quota_ledger
+from app.services.transcript_index import get_transcript_index
+from app.services.source_audio_cache import get_source_cache
+from app.services.clip_jobs import clip_metrics
+from app.services.stream_info_cache import stream_info_cache
+from app.services.search_manager import get_search_manager
+from app.services.rate_limiter import rate_limiter
+from app.services.search_events import search_event_stats
 from datetime import datetime
 from functools import wraps
 
@@ -65,4 +74,23 @@ def monitor():
         tasks=tasks,
         stats=stats,
         health_issues=health_issues
-    ) 
\ No newline at end of file
+    ) 
+
+
+@admin_monitor_bp.route('/monitor/stats')
+@admin_required
+def monitor_stats():
+    """Get cache and pipeline counters for this worker process."""
+    index = get_transcript_index()
+    source_cache = get_source_cache()
+    return jsonify({
+        'transcript_cache': transcript_cache.stats(),
+        'transcript_index': index.stats() if index else None,
+        'source_audio_cache': source_cache.stats() if source_cache else None,
+        'clip_jobs': clip_metrics.snapshot(),
+        'stream_info_cache': stream_info_cache.stats(),
+        'search_cache_breaker': get_search_manager().cache_breaker.stats(),
+        'rate_limits': rate_limiter.stats(),
+        'search_events': search_event_stats(),
+        'youtube_quota': quota_ledger.usage()
+    })
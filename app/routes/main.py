@@ -1,9 +1,10 @@
 """Main application routes."""
-from flask import Blueprint, render_template, send_file, jsonify, send_from_directory, current_app
+from flask import Blueprint, render_template, jsonify, send_from_directory, current_app
 import os
 import logging
 from flask_sqlalchemy import SQLAlchemy
 from flask_caching import Cache
+from app.services.clip_store import get_clip_store, send_clip
 
 logger = logging.getLogger(__name__)
 main = Blueprint('main', __name__)
@@ -38,15 +39,13 @@ def static_files(filename):
 def download_file(filename):
     """Download a generated audio clip file."""
     try:
-        file_path = os.path.join('clips', filename)
-        if not os.path.exists(file_path):
-            logger.error(f"File not found: {file_path}")
+        store = get_clip_store()
+        response = send_clip(store, filename) if store else None
+        if response is None:
+            logger.error(f"File not found: {filename}")
             return jsonify({"error": "File not found"}), 404
             
-        return send_file(
-            file_path,
-            as_attachment=True
-        )
+        return response
     except Exception as e:
         logger.error(f"Error downloading file {filename}: {e}")
         return jsonify({"error": "Error downloading file"}), 500
@@ -1,14 +1,34 @@
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import (
+    Blueprint, request, jsonify, current_app, Response,
+    stream_with_context, url_for, redirect, send_file
+)
 import os
+import re
+import json
 import logging
-from transformers import pipeline
-import torch
 from app.extensions import cache
-from app.utils.youtube_search_and_clip import (
-    setup_youtube_api, get_video_transcript,
-    search_word_in_transcript, download_audio_clip
+from app.utils.youtube_search_and_clip import setup_youtube_api, clip_output_path
+from app.utils.audio_segment import open_segment_stream, CLIP_BITRATE
+from app.utils.waveform import ensure_peaks, try_generate_peaks, slice_peaks
+from app.utils.compiled_transcript import normalize_text
+from app.services.search_manager import get_search_manager
+from app.services.rate_limiter import (
+    rate_limited, check_rate_limit, client_ip as request_client_ip
+)
+from app.services.video_matcher import (
+    match_videos, match_video, iter_video_matches, match_videos_batch
+)
+from app.services.youtube_search import search_videos, normalize_query
+from app.services.single_flight import SingleFlight
+from app.services.search_jobs import submit_search_job, get_job
+from app.services.transcript_index import lookup_local
+from app.services.clip_store import get_clip_store, send_clip
+from app.services.source_audio_cache import get_source_cache
+from app.services.stream_info_cache import stream_info_cache
+from app.services.clip_jobs import submit_clip_job, get_clip_job, QueueFull
+from app.services.clip_batch import (
+    normalize_batch, render_batch, stream_zip, stream_supercut
 )
-from app.services.search_manager import SearchManager
 from datetime import datetime
 
 
@@ -21,28 +41,73 @@ search_bp = Blueprint('search', __name__)
 # Initialize YouTube API client
 youtube = setup_youtube_api()
 
+# Coalesces identical concurrent searches across workers
+search_flight = SingleFlight('search')
 
-def get_ai_model():
-    """Get AI model configuration."""
-    return current_app.config.get(
-        'AI_MODEL_VERSION',
-        'distilbert-base-uncased-distilled-squad'
-    )
 
+# Results stay previewable (source fills allowed) for this long, in seconds
+_SHOWN_TTL = 3600
 
-def get_qa_pipeline():
-    """Initialize question-answering pipeline."""
-    return pipeline(
-        "question-answering",
-        model=get_ai_model(),
-        device_map="auto",
-        torch_dtype=(
-            torch.float16 if torch.cuda.is_available() else torch.float32
+_VIDEO_ID = re.compile(r'[A-Za-z0-9_-]{11}')
+
+
+def _remember_shown(videos):
+    """Note the videos this client was shown, so it may preview them."""
+    if not videos:
+        return
+    ip = request_client_ip()
+    try:
+        cache.set_many(
+            {f"shown:{ip}:{video['id']}": 1 for video in videos}, timeout=_SHOWN_TTL
         )
-    )
+    except Exception as e:
+        logger.error(f"Failed to remember shown videos: {str(e)}")
+
+
+def _was_shown(video_id):
+    """Whether a recent search returned this video to this client."""
+    try:
+        return bool(cache.get(f"shown:{request_client_ip()}:{video_id}"))
+    except Exception as e:
+        logger.error(f"Failed to check shown videos: {str(e)}")
+        return False
+
+
+def _authorize_search(search_mgr, token, client_ip, cost=1):
+    """Charge the subscription token or the free tier before searching.
+
+    The limit check and the charge are one atomic step, so concurrent
+    searches cannot overrun a limit. Returns an error response tuple, or
+    None if the search may proceed; see ``_refund_search`` for failures.
+    """
+    if token:
+        logger.info("Token provided - charging subscription")
+        status = search_mgr.charge_subscription(token, cost)
+        if not status['valid']:
+            logger.error(f"Invalid token: {status.get('error', 'Unknown error')}")
+            return jsonify({'error': status.get('error', 'Invalid token')}), 401
+        if not status['allowed']:
+            return jsonify({'error': 'Search limit reached'}), 403
+    else:
+        logger.info("No token provided - charging free searches")
+        if not search_mgr.increment_free_usage(client_ip, cost):
+            return jsonify({'error': 'Free search limit reached'}), 403
+    return None
+
+
+def _refund_search(search_mgr, token, client_ip, cost=1):
+    """Give back the searches charged for a search that failed."""
+    try:
+        if token:
+            search_mgr.refund_subscription_usage(token, cost)
+        else:
+            search_mgr.refund_free_usage(client_ip, cost)
+    except Exception as e:
+        logger.error(f"Failed to refund search usage: {str(e)}")
 
 
 @search_bp.route('/search', methods=['POST'])
+@rate_limited('search')
 def search():
     """Handle search requests."""
     logger.info("Received search request")
@@ -56,72 +121,44 @@ def search():
         logger.debug(f"Search request data: {data}")
         
         # Get client IP for free tier tracking
-        client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
+        client_ip = request_client_ip()
         
         # Initialize search manager
-        search_mgr = SearchManager()
+        search_mgr = get_search_manager()
         
-        # Check token if provided
-        token = data.get('token', '').strip()
-        if token:
-            logger.info("Token provided - checking subscription")
-            status = search_mgr.check_subscription(token)
-            if not status['valid']:
-                logger.error(f"Invalid token: {status.get('error', 'Unknown error')}")
-                return jsonify({'error': status.get('error', 'Invalid token')}), 401
-            if status['remaining'] <= 0:
-                return jsonify({'error': 'Search limit reached'}), 403
-        else:
-            logger.info("No token provided - checking free searches")
-            # Use SearchManager's safe cache operations for free tier
-            if not search_mgr.increment_free_usage(client_ip):
-                return jsonify({'error': 'Free search limit reached'}), 403
-
-        # Get search parameters
+        # Get search parameters; a malformed request is never charged
         person_name = data.get('person_name')
         search_word = data.get('search_word')
         if not person_name or not search_word:
             logger.error("Missing required search parameters")
             return jsonify({'error': 'Missing person_name or search_word'}), 400
 
+        # Check token if provided
+        token = data.get('token', '').strip()
+        error = _authorize_search(search_mgr, token, client_ip)
+        if error:
+            return error
+
         try:
-            # Perform YouTube search
-            search_query = f"{person_name} {search_word}"
-            logger.info(f"Performing YouTube search for: {search_query}")
-            
-            search_results = youtube.search().list(
-                part="id,snippet",
-                q=search_query,
-                type="video",
-                maxResults=10
-            ).execute()
-
-            # Process results
-            videos = []
-            for item in search_results.get('items', []):
-                try:
-                    video_id = item['id']['videoId']
-                    transcript = get_video_transcript(video_id)
-                    
-                    if transcript:
-                        matches = search_word_in_transcript(transcript, search_word)
-                        if matches:
-                            videos.append({
-                                'id': video_id,
-                                'title': item['snippet']['title'],
-                                'description': item['snippet']['description'],
-                                'thumbnail': item['snippet']['thumbnails']['default']['url'],
-                                'matches': matches
-                            })
-                except Exception as video_error:
-                    logger.error(f"Error processing video {video_id}: {str(video_error)}")
-                    continue
-
-            # Update usage if using subscription
-            if token and status['valid']:
-                search_mgr.increment_subscription_usage(token)
+            def run_search():
+                # Local transcript index first, then YouTube search (served
+                # from cache when possible) with concurrent transcript
+                # fetch and matching in ranking order
+                local = lookup_local(person_name, search_word)
+                if local is not None:
+                    return local
+                items = search_videos(youtube, person_name, search_word)
+                return match_videos(items, search_word)
+
+            # Identical concurrent searches share one pipeline run
+            videos = search_flight.do(
+                normalize_query(person_name, search_word),
+                run_search
+            )
 
             logger.info(f"Found {len(videos)} videos with matches")
+            _remember_shown(videos)
+            search_mgr.log_search(f"{person_name}: {search_word}", True, token, client_ip)
             return jsonify({
                 'success': True,
                 'results': videos
@@ -129,6 +166,10 @@ def search():
 
         except Exception as youtube_error:
             logger.error(f"YouTube API error: {str(youtube_error)}")
+            _refund_search(search_mgr, token, client_ip)
+            search_mgr.log_search(
+                f"{person_name}: {search_word}", False, token, client_ip, str(youtube_error)
+            )
             return jsonify({
                 'error': 'Error searching YouTube videos',
                 'details': str(youtube_error)
@@ -142,9 +183,277 @@ def search():
         }), 500
 
 
+@search_bp.route('/search/stream', methods=['POST'])
+@rate_limited('search')
+def search_stream():
+    """Stream search results as newline-delimited JSON.
+
+    Emits one ``result`` event per matching video as soon as its transcript
+    is matched, then a ``summary`` event carrying the updated usage.
+    """
+    logger.info("Received streaming search request")
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        person_name = data.get('person_name')
+        search_word = data.get('search_word')
+        if not person_name or not search_word:
+            return jsonify({'error': 'Missing person_name or search_word'}), 400
+
+        client_ip = request_client_ip()
+        search_mgr = get_search_manager()
+        token = data.get('token', '').strip()
+        error = _authorize_search(search_mgr, token, client_ip)
+        if error:
+            return error
+
+        try:
+            local = lookup_local(person_name, search_word)
+            items = [] if local is not None else search_videos(
+                youtube, person_name, search_word
+            )
+        except Exception as youtube_error:
+            logger.error(f"YouTube API error: {str(youtube_error)}")
+            _refund_search(search_mgr, token, client_ip)
+            search_mgr.log_search(
+                f"{person_name}: {search_word}", False, token, client_ip, str(youtube_error)
+            )
+            return jsonify({
+                'error': 'Error searching YouTube videos',
+                'details': str(youtube_error)
+            }), 500
+
+    except Exception as e:
+        logger.error(f"Unexpected error in search stream route: {str(e)}", exc_info=True)
+        return jsonify({
+            'error': 'Internal server error',
+            'details': str(e)
+        }), 500
+
+    def event(payload):
+        return json.dumps(payload, separators=(',', ':')) + '\n'
+
+    def generate():
+        count = 0
+        try:
+            if local is not None:
+                matched = enumerate(local)
+            else:
+                matched = iter_video_matches(
+                    items, lambda item: match_video(item, search_word)
+                )
+            for rank, video in matched:
+                count += 1
+                _remember_shown([video])
+                yield event({'type': 'result', 'rank': rank, 'video': video})
+
+            search_mgr.log_search(f"{person_name}: {search_word}", True, token, client_ip)
+            yield event({
+                'type': 'summary',
+                'count': count,
+                'usage': search_mgr.quota_status(token, client_ip)
+            })
+        except Exception as e:
+            logger.error(f"Error while streaming search results: {str(e)}", exc_info=True)
+            _refund_search(search_mgr, token, client_ip)
+            search_mgr.log_search(f"{person_name}: {search_word}", False, token, client_ip, str(e))
+            yield event({'type': 'error', 'error': 'Internal server error'})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/x-ndjson',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+@search_bp.route('/search/batch', methods=['POST'])
+@rate_limited('search')
+def search_batch():
+    """Search one person for several phrases in a single pipeline run.
+
+    Results match what a single search per phrase would return, grouped
+    per phrase. Each candidate video's transcript is fetched once and all
+    phrases are matched in one pass. The batch is charged
+    ``SearchManager.batch_search_cost`` searches: phrases the local index
+    answers are discounted, those needing YouTube cost one search each.
+    """
+    logger.info("Received batch search request")
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        person_name = data.get('person_name')
+        search_words = data.get('search_words')
+        if not person_name or not isinstance(search_words, list):
+            return jsonify({'error': 'Missing person_name or search_words'}), 400
+
+        # Phrases that normalize alike are one search
+        unique = {}
+        for word in search_words:
+            if isinstance(word, str) and normalize_text(word):
+                unique.setdefault(normalize_text(word), word.strip())
+        phrases = list(unique.values())
+        max_phrases = current_app.config.get('SEARCH_BATCH_MAX_PHRASES', 20)
+        if not phrases:
+            return jsonify({'error': 'No search words provided'}), 400
+        if len(phrases) > max_phrases:
+            return jsonify({'error': f'At most {max_phrases} search words per batch'}), 400
+
+        client_ip = request_client_ip()
+        search_mgr = get_search_manager()
+        token = data.get('token', '').strip()
+        local = {phrase: lookup_local(person_name, phrase) for phrase in phrases}
+        remote = [phrase for phrase in phrases if local[phrase] is None]
+        cost = search_mgr.batch_search_cost(len(phrases) - len(remote), len(remote))
+        error = _authorize_search(search_mgr, token, client_ip, cost)
+        if error:
+            return error
+
+        try:
+            def run_batch():
+                # Each phrase gets the candidates its single search would:
+                # the local index, else its own (cached) YouTube search.
+                # Candidates shared between phrases are fetched and scanned
+                # once, then each phrase keeps only its own, in its ranking.
+                grouped = {phrase: local[phrase] for phrase in phrases if local[phrase] is not None}
+                ranks, items = {}, {}
+                for phrase in remote:
+                    ranks[phrase] = {}
+                    for rank, item in enumerate(search_videos(youtube, person_name, phrase)):
+                        ranks[phrase][item['id']['videoId']] = rank
+                        items.setdefault(item['id']['videoId'], item)
+                if ranks:
+                    matched = match_videos_batch(list(items.values()), list(ranks))
+                    for phrase, videos in matched.items():
+                        own = ranks[phrase]
+                        grouped[phrase] = sorted(
+                            (video for video in videos if video['id'] in own),
+                            key=lambda video: own[video['id']]
+                        )
+                return grouped
+
+            # Identical concurrent batches share one pipeline run
+            grouped = search_flight.do(
+                'batch:' + '\n'.join(normalize_query(person_name, phrase) for phrase in phrases),
+                run_batch
+            )
+            _remember_shown([video for videos in grouped.values() for video in videos])
+            search_mgr.log_search(f"{person_name}: {', '.join(phrases)}", True, token, client_ip)
+
+            return jsonify({
+                'success': True,
+                'cost': cost,
+                'results': grouped
+            })
+
+        except Exception as youtube_error:
+            logger.error(f"YouTube API error: {str(youtube_error)}")
+            _refund_search(search_mgr, token, client_ip, cost)
+            search_mgr.log_search(
+                f"{person_name}: {', '.join(phrases)}", False, token, client_ip, str(youtube_error)
+            )
+            return jsonify({
+                'error': 'Error searching YouTube videos',
+                'details': str(youtube_error)
+            }), 500
+
+    except Exception as e:
+        logger.error(f"Unexpected error in batch search route: {str(e)}", exc_info=True)
+        return jsonify({
+            'error': 'Internal server error',
+            'details': str(e)
+        }), 500
+
+
+@search_bp.route('/search/jobs', methods=['POST'])
+@rate_limited('search')
+def create_search_job():
+    """Queue a search and return its job ID immediately.
+
+    Usage is charged before the job is queued and refunded if it fails.
+    """
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No JSON data provided'}), 400
+
+        person_name = data.get('person_name')
+        search_word = data.get('search_word')
+        if not person_name or not search_word:
+            return jsonify({'error': 'Missing person_name or search_word'}), 400
+
+        client_ip = request_client_ip()
+        search_mgr = get_search_manager()
+        token = data.get('token', '').strip()
+
+        error = _authorize_search(search_mgr, token, client_ip)
+        if error:
+            return error
+
+        try:
+            job_id = submit_search_job(
+                youtube, person_name, search_word,
+                token=token or None, ip_address=client_ip
+            )
+        except Exception:
+            _refund_search(search_mgr, token, client_ip)
+            raise
+        return jsonify({
+            'success': True,
+            'job_id': job_id,
+            'status_url': url_for('search.search_job_status', job_id=job_id)
+        }), 202
+
+    except Exception as e:
+        logger.error(f"Error creating search job: {str(e)}", exc_info=True)
+        return jsonify({
+            'error': 'Internal server error',
+            'details': str(e)
+        }), 500
+
+
+@search_bp.route('/search/jobs/<job_id>', methods=['GET'])
+def search_job_status(job_id):
+    """Get progress and partial or final results for a search job."""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    _remember_shown(job['results'])
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'results': job['results'],
+        'error': job['error']
+    })
+
+
+def _clip_job_response(job):
+    """Serialize a clip job, adding the clip URL once it is ready."""
+    response = {
+        'success': job['status'] != 'failed',
+        'job_id': job['id'],
+        'status': job['status'],
+        'status_url': url_for('search.clip_job_status', job_id=job['id']),
+        'error': job['error']
+    }
+    if job['status'] == 'done':
+        response['url'] = url_for('search.download_file', filename=job['file'])
+        response['peaks_url'] = url_for('search.clip_peaks', filename=job['file'])
+    return response
+
+
 @search_bp.route('/download_clip', methods=['POST'])
+@rate_limited('clip')
 def download_clip():
-    """Download an audio clip from a YouTube video."""
+    """Queue an audio clip from a YouTube video for rendering."""
     try:
         data = request.get_json()
         if not data:
@@ -154,26 +463,37 @@ def download_clip():
         if not video_id:
             return jsonify({'error': 'video_id is required'}), 400
             
-        video_url = f"https://youtube.com/watch?v={video_id}"
         start_time = float(data.get('timestamp', 0))
         duration = float(data.get('duration', 1.0))
+        max_duration = current_app.config.get('CLIP_MAX_DURATION', 60)
+        if start_time < 0 or not 0 < duration <= max_duration:
+            return jsonify({'error': 'Invalid timestamp or duration'}), 400
         
-        output_file = download_audio_clip(
-            video_url,
-            start_time,
-            duration
-        )
+        if current_app.config.get('CLIP_DELIVERY') == 'stream':
+            # Hand out a URL that renders while it downloads, unless the
+            # clip is already stored
+            _, output_path = clip_output_path(
+                f"https://youtube.com/watch?v={video_id}", start_time, duration
+            )
+            if not os.path.exists(output_path):
+                return jsonify({
+                    'success': True,
+                    'status': 'done',
+                    'url': url_for(
+                        'search.stream_clip', video_id=video_id,
+                        timestamp=start_time, duration=duration
+                    )
+                })
+
+        try:
+            job = submit_clip_job(video_id, start_time, duration)
+        except QueueFull as e:
+            response = jsonify({'success': False, 'error': str(e)})
+            response.headers['Retry-After'] = '5'
+            return response, 503
         
-        if output_file:
-            return jsonify({
-                'success': True,
-                'file_path': output_file
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'Failed to create clip'
-            })
+        status_code = 200 if job['status'] == 'done' else 202
+        return jsonify(_clip_job_response(job)), status_code
             
     except Exception as e:
         logger.exception("Error in download_clip endpoint")
@@ -183,14 +503,165 @@ def download_clip():
         }), 500
 
 
+@search_bp.route('/download_clip/stream', methods=['GET'])
+@rate_limited('clip')
+def stream_clip():
+    """Stream a clip to the client while ffmpeg is still encoding it."""
+    video_id = request.args.get('video_id', '').strip()
+    if not video_id:
+        return jsonify({'error': 'video_id is required'}), 400
+    try:
+        start_time = float(request.args.get('timestamp', 0))
+        duration = float(request.args.get('duration', 1.0))
+    except ValueError:
+        return jsonify({'error': 'Invalid timestamp or duration'}), 400
+    config = current_app.config
+    if start_time < 0 or not 0 < duration <= config.get('CLIP_MAX_DURATION', 60):
+        return jsonify({'error': 'Invalid timestamp or duration'}), 400
+
+    video_url = f"https://youtube.com/watch?v={video_id}"
+    name, output_path = clip_output_path(video_url, start_time, duration)
+    if os.path.exists(output_path):
+        return redirect(url_for('search.download_file', filename=os.path.basename(output_path)))
+
+    store = get_clip_store()
+    # Same limits as a queued clip job
+    timeout = config.get('CLIP_JOB_TIMEOUT', 120)
+    stream_options = {
+        'timeout': timeout,
+        'threads': config.get('CLIP_FFMPEG_THREADS', 1),
+        'niceness': config.get('CLIP_FFMPEG_NICE', 10),
+        'cpu_seconds': timeout
+    }
+    if name and store and config.get('CLIP_STREAM_CACHE', True) \
+            and not config.get('CLIP_SNAP_TOLERANCE', 0):
+        # Keep a copy in the clip store once the encode completes; streams
+        # are cut exactly, so they would not match a snapped clip's name
+        def on_complete(path):
+            try_generate_peaks(path)
+            store.add(name, video_id, start_time, duration, bitrate=CLIP_BITRATE)
+
+        stream_options['tee_path'] = output_path
+        stream_options['on_complete'] = on_complete
+
+    try:
+        chunks = open_segment_stream(
+            video_url, start_time, duration,
+            source_cache=get_source_cache(), stream_cache=stream_info_cache,
+            **stream_options
+        )
+    except Exception as e:
+        logger.exception("Error starting clip stream")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+    def generate():
+        try:
+            yield from chunks
+        except RuntimeError as e:
+            # Headers are already sent; the client sees a truncated file
+            logger.error(f"Clip stream for {video_id} failed: {str(e)}")
+
+    filename = f"clip_{video_id}_{int(start_time)}s_to_{int(start_time + duration)}s.mp3"
+    return Response(
+        stream_with_context(generate()),
+        mimetype='audio/mpeg',
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+@search_bp.route('/download_clip/batch', methods=['POST'])
+@rate_limited('clip', cost=5)
+def download_clip_batch():
+    """Render many clips and stream them back as a ZIP or one supercut.
+
+    Accepts JSON (``{"clips": [...], "format": "zip"}``) or a form post
+    with the clip list JSON-encoded in a ``clips`` field, so browsers can
+    stream the download straight to disk.
+    """
+    config = current_app.config
+    if request.is_json:
+        data = request.get_json() or {}
+        entries = data.get('clips')
+        output_format = data.get('format', 'zip')
+    else:
+        try:
+            entries = json.loads(request.form.get('clips', ''))
+        except ValueError:
+            return jsonify({'error': 'clips must be a JSON list'}), 400
+        output_format = request.form.get('format', 'zip')
+
+    if output_format not in ('zip', 'concat'):
+        return jsonify({'error': "format must be 'zip' or 'concat'"}), 400
+    try:
+        clips = normalize_batch(
+            entries,
+            config.get('CLIP_BATCH_MAX', 50),
+            config.get('CLIP_MAX_DURATION', 60)
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    timeout = config.get('CLIP_JOB_TIMEOUT', 120)
+    niceness = config.get('CLIP_FFMPEG_NICE', 10)
+    results = render_batch(
+        clips,
+        max_workers=config.get('CLIP_BATCH_WORKERS', 4),
+        timeout=timeout,
+        threads=config.get('CLIP_FFMPEG_THREADS', 1),
+        niceness=niceness,
+        cpu_seconds=timeout,
+        snap_tolerance=config.get('CLIP_SNAP_TOLERANCE', 0)
+    )
+    stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+
+    if output_format == 'zip':
+        body, mimetype, filename = stream_zip(results), 'application/zip', f"audiosnipt_clips_{stamp}.zip"
+    else:
+        body = stream_supercut(
+            results, timeout=timeout, niceness=niceness, cpu_seconds=timeout
+        )
+        mimetype, filename = 'audio/mpeg', f"audiosnipt_supercut_{stamp}.mp3"
+
+    def generate():
+        try:
+            yield from body
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated file
+            logger.error(f"Batch clip export failed: {str(e)}", exc_info=True)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Cache-Control': 'no-store',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+@search_bp.route('/download_clip/jobs/<job_id>', methods=['GET'])
+def clip_job_status(job_id):
+    """Get the status of a clip job and the clip URL once it is done."""
+    job = get_clip_job(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(_clip_job_response(job))
+
+
 @search_bp.route('/clips/<path:filename>')
 def download_file(filename):
     """Download a generated audio clip."""
     try:
-        return send_file(
-            os.path.join('clips', filename),
-            as_attachment=True
-        )
+        store = get_clip_store()
+        response = send_clip(store, filename) if store else None
+        if response is None:
+            return jsonify({'success': False, 'error': 'File not found'}), 404
+        return response
     except Exception as e:
         logger.exception("Error downloading clip")
         return jsonify({
@@ -199,34 +670,111 @@ def download_file(filename):
         }), 500
 
 
-@search_bp.route('/check_searches', methods=['POST'])
+@search_bp.route('/waveform/clips/<filename>')
+def clip_peaks(filename):
+    """Waveform peaks of a stored clip (see ``app.utils.waveform``)."""
+    try:
+        store = get_clip_store()
+        path = store.resolve(filename, touch=False) if store else None
+        if path is None:
+            return jsonify({'success': False, 'error': 'File not found'}), 404
+        response = send_file(
+            ensure_peaks(path),
+            mimetype='application/octet-stream',
+            conditional=True,
+            etag=True,
+            max_age=current_app.config.get('CLIP_CACHE_MAX_AGE', 31536000)
+        )
+        response.cache_control.public = True
+        return response
+    except Exception as e:
+        logger.exception("Error serving clip peaks")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@search_bp.route('/waveform/sources/<video_id>')
+@rate_limited('waveform')
+def source_peaks(video_id):
+    """Waveform peaks of a cached source track, optionally one window of it.
+
+    Lets the results page preview the audio around a match before any clip
+    is rendered. Returns 404 until the track is in the source cache; with
+    ``fill=1`` the track is cached in the background instead and 202 is
+    returned, so the page can poll. Fills are only started for videos a
+    recent search returned to this client, and are charged to the clip
+    rate limit.
+    """
+    if not _VIDEO_ID.fullmatch(video_id):
+        return jsonify({'success': False, 'error': 'Invalid video ID'}), 400
+    try:
+        start_time = float(request.args.get('timestamp', 0))
+        duration = request.args.get('duration', type=float)
+    except ValueError:
+        return jsonify({'error': 'Invalid timestamp or duration'}), 400
+    try:
+        source_cache = get_source_cache()
+        path = source_cache.get(video_id) if source_cache else None
+        if path is None:
+            if not (source_cache and request.args.get('fill')):
+                return jsonify({'success': False, 'error': 'Source not cached'}), 404
+            if not source_cache.is_filling(video_id):
+                if not _was_shown(video_id):
+                    return jsonify({'success': False, 'error': 'Source not cached'}), 404
+                rejected = check_rate_limit('clip')
+                if rejected:
+                    return rejected
+                video_url = f"https://youtube.com/watch?v={video_id}"
+                if not source_cache.fill_async(video_id, video_url):
+                    response = jsonify({
+                        'success': False,
+                        'error': 'Too many previews are loading, please try again shortly'
+                    })
+                    response.headers['Retry-After'] = '10'
+                    return response, 503
+            response = jsonify({'success': False, 'status': 'pending'})
+            response.headers['Retry-After'] = '3'
+            return response, 202
+        with open(ensure_peaks(path, timeout=600), 'rb') as peaks_file:
+            data = peaks_file.read()
+        if duration:
+            data = slice_peaks(data, start_time, duration)
+        response = Response(data, mimetype='application/octet-stream')
+        response.add_etag()
+        response.cache_control.public = True
+        response.cache_control.max_age = 3600
+        return response.make_conditional(request)
+    except Exception as e:
+        logger.exception("Error serving source peaks")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@search_bp.route('/check_searches', methods=['GET', 'POST'])
+@rate_limited('quota')
 def check_searches():
-    """Check remaining searches for a token or free tier."""
+    """Check remaining searches for a token or free tier.
+
+    GET reads the token from the ``X-Search-Token`` header (keeping it out
+    of URLs and access logs) and is cacheable: the response carries an ETag
+    and a short private max-age, so repeat polls are answered by the
+    browser cache or with a 304.
+    """
     try:
-        data = request.get_json()
-        token = data.get('token', '').strip() if data else ''
-        client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
-        
-        search_mgr = SearchManager()
-        
-        if token:
-            status = search_mgr.check_subscription(token)
-            if status['valid']:
-                return jsonify({
-                    'success': True,
-                    'searches_remaining': status['remaining'],
-                    'searches_used': status['used'],
-                    'expires': status['expires']
-                })
+        if request.method == 'GET':
+            token = request.headers.get('X-Search-Token', '').strip()
+        else:
+            data = request.get_json(silent=True)
+            token = data.get('token', '').strip() if data else ''
+        client_ip = request_client_ip()
         
-        # Return free tier status
-        usage = search_mgr.get_free_searches(client_ip)
-        return jsonify({
-            'success': True,
-            'searches_remaining': usage['remaining'],
-            'searches_used': usage['used'],
-            'expires': usage['expires']
-        })
+        status = get_search_manager().quota_status(token, client_ip)
+        response = jsonify({'success': True, **status})
+        if request.method == 'GET':
+            response.add_etag()
+            response.cache_control.private = True
+            response.cache_control.max_age = current_app.config.get('QUOTA_STATUS_MAX_AGE', 5)
+            response.vary.add('X-Search-Token')
+            response = response.make_conditional(request)
+        return response
         
     except Exception as e:
         logger.error(f"Error checking searches: {e}", exc_info=True)
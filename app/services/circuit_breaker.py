@@ -0,0 +1,123 @@
+"""Circuit breaker for calls to a shared backend such as Redis."""
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker with exponential probe backoff.
+
+    While closed, calls go through and consecutive failures are counted;
+    ``failure_threshold`` of them open the breaker. While open, callers
+    skip the backend. After the current delay a single probe runs: in a
+    background thread when a ``probe`` callable was given with the failure,
+    otherwise as the next caller's request (half-open). A successful probe
+    closes the breaker; a failed one reopens it with the delay doubled, up
+    to ``max_delay``.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold=3, base_delay=1.0, max_delay=60.0):
+        """Initialize circuit breaker."""
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._delay = base_delay
+        self._retry_at = 0.0
+        self._probe = None
+        self._trips = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow(self):
+        """Whether a call should go to the backend now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._probe is None \
+                    and time.monotonic() >= self._retry_at:
+                # Let this one request through as the probe
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        """Note a successful call; closes the breaker if it was probing."""
+        with self._lock:
+            self._failures = 0
+            if self._state == self.CLOSED:
+                return
+            self._state = self.CLOSED
+            self._delay = self.base_delay
+            self._probe = None
+        logger.info(f"Circuit '{self.name}' closed")
+
+    def record_failure(self, probe=None):
+        """Note a failed call, opening the breaker at the threshold.
+
+        ``probe`` is a callable that checks the backend (raising or
+        returning False when it is still down).
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open(probe, min(self._delay * 2, self.max_delay))
+                return
+            if self._state == self.OPEN:
+                return
+            self._failures += 1
+            if self._failures < self.failure_threshold:
+                return
+            self._trips += 1
+            self._open(probe, self.base_delay)
+
+    def _open(self, probe, delay):
+        """Open the breaker; caller holds the lock."""
+        self._state = self.OPEN
+        self._delay = delay
+        self._retry_at = time.monotonic() + delay
+        self._probe = probe
+        logger.warning(f"Circuit '{self.name}' open, retrying in {delay:.1f}s")
+        if probe is not None:
+            timer = threading.Timer(delay, self._run_probe)
+            timer.daemon = True
+            timer.start()
+
+    def _run_probe(self):
+        with self._lock:
+            if self._state != self.OPEN:
+                return
+            self._state = self.HALF_OPEN
+            probe = self._probe
+        try:
+            healthy = probe() is not False
+        except Exception as e:
+            logger.debug(f"Circuit '{self.name}' probe failed: {str(e)}")
+            healthy = False
+        if healthy:
+            self.record_success()
+        else:
+            self.record_failure(probe)
+
+    def stats(self):
+        """Current state and counters."""
+        with self._lock:
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'trips': self._trips,
+                'retry_delay': self._delay,
+                'retry_in': max(self._retry_at - time.monotonic(), 0)
+                if self._state != self.CLOSED else 0
+            }
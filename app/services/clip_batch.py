@@ -0,0 +1,242 @@
+"""Batch clip export streamed as a ZIP archive or a single supercut."""
+import os
+import logging
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app
+from app.services.clip_store import get_clip_store
+from app.services.source_audio_cache import get_source_cache
+from app.services.stream_info_cache import stream_info_cache
+from app.utils.youtube_search_and_clip import clip_output_path
+from app.utils.waveform import try_generate_peaks
+from app.utils.audio_segment import (
+    render_segment, build_concat_command, resource_prefix, stream_process, CLIP_BITRATE
+)
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def normalize_batch(entries, max_clips, max_duration):
+    """Validate ``[{'video_id', 'timestamp', 'duration'}, ...]``.
+
+    Returns clean ``{'video_id', 'start', 'duration'}`` dicts; raises
+    ValueError describing the first bad entry.
+    """
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("clips must be a non-empty list")
+    if len(entries) > max_clips:
+        raise ValueError(f"At most {max_clips} clips per batch")
+    clips = []
+    for position, entry in enumerate(entries):
+        try:
+            video_id = str(entry['video_id']).strip()
+            start = float(entry.get('timestamp', entry.get('start', 0)))
+            duration = float(entry.get('duration', 1.0))
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise ValueError(f"Clip {position + 1} needs video_id, timestamp and duration")
+        if not video_id or start < 0 or not 0 < duration <= max_duration:
+            raise ValueError(f"Clip {position + 1} has an invalid timestamp or duration")
+        clips.append({'video_id': video_id, 'start': start, 'duration': duration})
+    return clips
+
+
+def _prepare_source(video_id, count, source_cache):
+    """Pick one source for all clips of a video, fetching it at most once.
+
+    A cached track is used as is. Videos with several clips that are short
+    enough are downloaded into the source cache once and cut locally;
+    otherwise each clip seeks the remote stream resolved here.
+    """
+    video_url = f"https://youtube.com/watch?v={video_id}"
+    if source_cache:
+        cached = source_cache.get(video_id)
+        if cached:
+            return {'source': cached, 'http_headers': None}
+
+    stream, from_cache = stream_info_cache.resolve(video_url)
+    if source_cache and source_cache.should_cache(stream['duration']):
+        if count > 1:
+            try:
+                path = source_cache.fill(video_id, video_url)
+                if path:
+                    return {'source': path, 'http_headers': None}
+            except Exception as e:
+                logger.warning(f"Source fill for {video_id} failed, cutting remotely: {str(e)}")
+        elif source_cache.note_clip(video_id):
+            source_cache.fill_async(video_id, video_url)
+    return {
+        'source': stream['url'],
+        'http_headers': stream['http_headers'],
+        'video_url': video_url,
+        'from_cache': from_cache
+    }
+
+
+def render_batch(clips, max_workers=4, **render_options):
+    """Render clips in parallel, yielding ``(index, clip, path, error)``.
+
+    Results arrive in completion order. Clips already in the clip store are
+    yielded first; the rest are grouped by video so each source is resolved
+    (and, where worthwhile, downloaded) once.
+    """
+    store = get_clip_store()
+    source_cache = get_source_cache()
+
+    groups = defaultdict(list)
+    for index, clip in enumerate(clips):
+        video_url = f"https://youtube.com/watch?v={clip['video_id']}"
+        name, path = clip_output_path(video_url, clip['start'], clip['duration'])
+        if os.path.exists(path):
+            if store:
+                store.touch(name)
+            yield index, clip, path, None
+        else:
+            groups[clip['video_id']].append((index, clip, name, path))
+    if not groups:
+        return
+
+    def render(clip, name, path, source):
+        try:
+            render_segment(
+                source['source'], clip['start'], clip['duration'], path,
+                http_headers=source['http_headers'], **render_options
+            )
+        except RuntimeError:
+            if not source.get('from_cache'):
+                raise
+            # The cached signed URL stopped working; extract it again once
+            stream_info_cache.invalidate(source['video_url'])
+            stream, _ = stream_info_cache.resolve(source['video_url'], refresh=True)
+            source.update(source=stream['url'], http_headers=stream['http_headers'], from_cache=False)
+            render_segment(
+                stream['url'], clip['start'], clip['duration'], path,
+                http_headers=stream['http_headers'], **render_options
+            )
+        try_generate_peaks(path)
+        if name and store:
+            store.add(
+                name, clip['video_id'], clip['start'], clip['duration'],
+                bitrate=CLIP_BITRATE, snap=render_options.get('snap_tolerance', 0)
+            )
+        return path
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='clip-batch')
+    try:
+        pending = {
+            executor.submit(_prepare_source, video_id, len(members), source_cache): ('source', video_id)
+            for video_id, members in groups.items()
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, key = pending.pop(future)
+                if kind == 'source':
+                    try:
+                        source = future.result()
+                    except Exception as e:
+                        logger.error(f"Could not prepare source for {key}: {str(e)}")
+                        for index, clip, _, _ in groups[key]:
+                            yield index, clip, None, str(e)
+                        continue
+                    for index, clip, name, path in groups[key]:
+                        pending[executor.submit(render, clip, name, path, source)] = ('clip', (index, clip))
+                else:
+                    index, clip = key
+                    try:
+                        yield index, clip, future.result(), None
+                    except Exception as e:
+                        logger.error(f"Batch clip {index} failed: {str(e)}")
+                        yield index, clip, None, str(e)
+    finally:
+        # Stop queued renders if the client went away; running ones finish
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _ZipSink:
+    """Write-only, unseekable file object that buffers ZIP output chunks."""
+
+    def __init__(self):
+        """Initialize the sink."""
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Yield and forget everything written so far."""
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+def _entry_name(index, clip):
+    return f"{index + 1:03d}_{clip['video_id']}_{int(clip['start'])}s.mp3"
+
+
+def stream_zip(results):
+    """Stream a ZIP archive, adding each clip as soon as it is rendered.
+
+    Entries are stored uncompressed (MP3 does not deflate) and written
+    with data descriptors, so memory use is bounded by one read chunk.
+    Failed clips are listed in an ``errors.txt`` entry at the end.
+    """
+    sink = _ZipSink()
+    errors = []
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for index, clip, path, error in results:
+            if error:
+                errors.append(f"{_entry_name(index, clip)}: {error}")
+                continue
+            try:
+                source = open(path, 'rb')
+            except OSError as e:
+                # Evicted between rendering and archiving
+                errors.append(f"{_entry_name(index, clip)}: {str(e)}")
+                continue
+            with source, archive.open(_entry_name(index, clip), 'w') as entry:
+                while True:
+                    chunk = source.read(_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    entry.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+        if errors:
+            archive.writestr('errors.txt', '\n'.join(sorted(errors)) + '\n')
+    yield from sink.drain()
+
+
+def stream_supercut(results, niceness=None, cpu_seconds=None, **stream_options):
+    """Stream every rendered clip joined in request order as one MP3.
+
+    Joining needs all clips, so bytes start flowing once the last clip is
+    rendered; the joined file itself is piped from ffmpeg, never stored.
+    The join runs under the same nice/prlimit limits as the clip renders.
+    """
+    rendered = {}
+    for index, clip, path, error in results:
+        if error:
+            logger.warning(f"Leaving clip {index} out of supercut: {error}")
+        else:
+            rendered[index] = path
+    if not rendered:
+        raise RuntimeError("No clips could be rendered")
+    paths = [rendered[index] for index in sorted(rendered)]
+    if len(paths) == 1:
+        with open(paths[0], 'rb') as clip_file:
+            while True:
+                chunk = clip_file.read(_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+    command = build_concat_command(
+        paths, threads=current_app.config.get('CLIP_FFMPEG_THREADS', 1)
+    )
+    command = resource_prefix(niceness, cpu_seconds) + command
+    yield from stream_process(command, **stream_options)
@@ -0,0 +1,245 @@
+"""Background clip rendering jobs with status and metrics in Redis."""
+import os
+import time
+import uuid
+import logging
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from yt_dlp.utils import DownloadError
+from app.extensions import cache, get_redis_client
+from app.utils.youtube_search_and_clip import clip_output_path, render_clip
+
+logger = logging.getLogger(__name__)
+
+# Failures worth another attempt: yt-dlp network errors and ffmpeg timeouts.
+# ffmpeg exiting non-zero (RuntimeError) or a missing binary (OSError) fails
+# the same way again, so those fail the job at once.
+RETRYABLE_ERRORS = (DownloadError, subprocess.TimeoutExpired)
+
+
+class QueueFull(Exception):
+    """Raised when this process already has too many clip jobs in flight."""
+
+
+class ClipJobMetrics:
+    """Host-wide clip job counters stored in a Redis hash."""
+
+    KEY = 'clip_jobs:metrics'
+
+    def __init__(self):
+        """Initialize clip job metrics."""
+        self._in_flight = {'queued': 0, 'running': 0}
+        self._lock = threading.Lock()
+
+    def record(self, **increments):
+        """Add to one or more counters (float amounts allowed)."""
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline()
+            for field, amount in increments.items():
+                pipe.hincrbyfloat(self.KEY, field, amount)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Clip job metrics update failed: {str(e)}")
+
+    def transition(self, source, target):
+        """Move one job between this process's queued/running gauges."""
+        with self._lock:
+            if source:
+                self._in_flight[source] -= 1
+            if target:
+                self._in_flight[target] += 1
+
+    def in_flight(self):
+        """Jobs queued or running in this process."""
+        with self._lock:
+            return self._in_flight['queued'] + self._in_flight['running']
+
+    def snapshot(self):
+        """Counters, derived queue depth and mean wait/run times."""
+        client = get_redis_client()
+        raw = {}
+        if client is not None:
+            try:
+                raw = {
+                    key.decode(): float(value)
+                    for key, value in client.hgetall(self.KEY).items()
+                }
+            except Exception as e:
+                logger.error(f"Clip job metrics read failed: {str(e)}")
+        started = raw.get('started', 0)
+        finished = raw.get('done', 0) + raw.get('failed', 0)
+        with self._lock:
+            process = dict(self._in_flight)
+        return {
+            'counters': raw,
+            'queue_depth': max(raw.get('submitted', 0) - started, 0),
+            'running': max(started - finished, 0),
+            'mean_wait_seconds': raw.get('wait_seconds', 0) / started if started else 0,
+            'mean_run_seconds': raw.get('run_seconds', 0) / finished if finished else 0,
+            'process': process
+        }
+
+
+clip_metrics = ClipJobMetrics()
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_clip_executor():
+    """Get the bounded clip rendering executor for this process.
+
+    Each worker thread drives one ffmpeg process at a time, so this also
+    caps concurrent ffmpeg processes per gunicorn worker.
+    """
+    global _executor, _executor_pid
+    if _executor is not None and _executor_pid == os.getpid():
+        return _executor
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            max_workers = current_app.config.get('CLIP_WORKERS', 2)
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='clip-job'
+            )
+            _executor_pid = os.getpid()
+            logger.info(f"Clip job executor started ({max_workers} workers)")
+    return _executor
+
+
+def _job_key(job_id):
+    return f"clip_job:{job_id}"
+
+
+def _active_key(name):
+    return f"clip_job_active:{name}"
+
+
+def get_clip_job(job_id):
+    """Get a clip job's state, or None if unknown or expired."""
+    return cache.get(_job_key(job_id))
+
+
+def _save_job(job):
+    job['updated'] = datetime.utcnow().isoformat()
+    cache.set(
+        _job_key(job['id']),
+        job,
+        timeout=current_app.config.get('CLIP_JOB_TTL', 3600)
+    )
+
+
+def submit_clip_job(video_id, start_time, duration):
+    """Queue a clip for rendering and return its job state.
+
+    Clips already in the store complete immediately, and a request for a
+    clip that is already being rendered joins the existing job. Raises
+    QueueFull when this process is at its CLIP_QUEUE_MAX limit.
+    """
+    config = current_app.config
+    video_url = f"https://youtube.com/watch?v={video_id}"
+    name, output_path = clip_output_path(video_url, start_time, duration)
+
+    job = {
+        'id': uuid.uuid4().hex,
+        'status': 'queued',
+        'video_id': video_id,
+        'start': start_time,
+        'duration': duration,
+        'file': None,
+        'attempts': 0,
+        'error': None,
+        'created': datetime.utcnow().isoformat()
+    }
+
+    if os.path.exists(output_path):
+        job['status'] = 'done'
+        job['file'] = os.path.basename(output_path)
+        _save_job(job)
+        return job
+
+    if name:
+        active_id = cache.get(_active_key(name))
+        active = get_clip_job(active_id) if active_id else None
+        if active and active['status'] in ('queued', 'running'):
+            return active
+
+    if clip_metrics.in_flight() >= config.get('CLIP_QUEUE_MAX', 20):
+        clip_metrics.record(rejected=1)
+        raise QueueFull("Too many clips are being rendered, try again shortly")
+
+    _save_job(job)
+    if name:
+        cache.set(_active_key(name), job['id'], timeout=config.get('CLIP_JOB_TIMEOUT', 120) * 4)
+
+    app = current_app._get_current_object()
+    submitted = time.monotonic()
+    clip_metrics.transition(None, 'queued')
+    clip_metrics.record(submitted=1)
+
+    def run():
+        with app.app_context():
+            _run_clip_job(job, video_url, submitted)
+
+    get_clip_executor().submit(run)
+    return job
+
+
+def _run_clip_job(job, video_url, submitted):
+    """Render a clip with retries, recording status and timings."""
+    config = current_app.config
+    retries = config.get('CLIP_JOB_RETRIES', 2)
+    timeout = config.get('CLIP_JOB_TIMEOUT', 120)
+    render_options = {
+        'timeout': timeout,
+        'threads': config.get('CLIP_FFMPEG_THREADS', 1),
+        'niceness': config.get('CLIP_FFMPEG_NICE', 10),
+        'cpu_seconds': timeout
+    }
+
+    started = time.monotonic()
+    clip_metrics.transition('queued', 'running')
+    clip_metrics.record(started=1, wait_seconds=started - submitted)
+    job['status'] = 'running'
+    try:
+        _save_job(job)
+        for attempt in range(retries + 1):
+            job['attempts'] = attempt + 1
+            try:
+                output_path = render_clip(
+                    video_url, job['start'], job['duration'], **render_options
+                )
+                break
+            except RETRYABLE_ERRORS as e:
+                if attempt == retries:
+                    raise
+                logger.warning(
+                    f"Clip job {job['id']} attempt {attempt + 1} failed, retrying: {str(e)}"
+                )
+                clip_metrics.record(retried=1)
+                time.sleep(2 ** attempt)
+
+        job['status'] = 'done'
+        job['file'] = os.path.basename(output_path)
+        clip_metrics.record(done=1, run_seconds=time.monotonic() - started)
+        logger.info(f"Clip job {job['id']} finished in {time.monotonic() - started:.1f}s")
+
+    except Exception as e:
+        logger.error(f"Clip job {job['id']} failed: {str(e)}", exc_info=True)
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        clip_metrics.record(failed=1, run_seconds=time.monotonic() - started)
+
+    finally:
+        clip_metrics.transition('running', None)
+        try:
+            _save_job(job)
+        except Exception as save_error:
+            logger.error(f"Failed to save clip job state: {str(save_error)}")
@@ -0,0 +1,326 @@
+"""Managed storage for generated audio clips."""
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import logging
+import sqlite3
+import mimetypes
+import threading
+from zlib import adler32
+from urllib.parse import quote
+from flask import current_app, has_app_context, request, send_file
+from app.utils.waveform import PEAKS_SUFFIX, peaks_path
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    video_id TEXT NOT NULL DEFAULT '',
+    start REAL,
+    duration REAL,
+    params TEXT NOT NULL DEFAULT '{}',
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    downloads INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_clips_last_access ON clips (last_access);
+CREATE INDEX IF NOT EXISTS ix_clips_video ON clips (video_id);
+"""
+
+_CLIP_NAME = re.compile(r'^[0-9a-f]{40}\.[a-z0-9]+$')
+
+
+def clip_id(video_id, start_time, duration, **params):
+    """Deterministic id of a clip: hash of its source and cut parameters."""
+    key = json.dumps(
+        [video_id, round(float(start_time), 3), round(float(duration), 3), params],
+        sort_keys=True
+    )
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class ClipStore:
+    """Owns the UPLOAD_FOLDER layout, its metadata index and eviction.
+
+    Clips are stored as ``<root>/<id[:2]>/<id>.<ext>``. The SQLite index
+    (kept outside the served tree) records size, source video, cut
+    parameters and last access for every clip.
+    """
+
+    def __init__(self, root, index_path, max_bytes, max_age, min_free_bytes=0):
+        """Initialize clip store."""
+        self.root = os.path.abspath(root)
+        self.index_path = index_path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.min_free_bytes = min_free_bytes
+        self._local = threading.local()
+        os.makedirs(self.root, exist_ok=True)
+        directory = os.path.dirname(index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        """Get this thread's connection (one per thread and process)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.index_path, timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def path_for(self, name):
+        """Sharded path of a clip file name such as ``<id>.mp3``."""
+        return os.path.join(self.root, name[:2], name)
+
+    def get(self, name):
+        """Return the path of a stored clip, or None."""
+        path = self.path_for(name)
+        return path if os.path.exists(path) else None
+
+    def add(self, name, video_id='', start_time=None, duration=None, **params):
+        """Record a clip that has been written to ``path_for(name)``."""
+        path = self.path_for(name)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO clips "
+                "(name, path, video_id, start, duration, params, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    name, path, video_id, start_time, duration,
+                    json.dumps(params, sort_keys=True),
+                    os.path.getsize(path), now, now
+                )
+            )
+        return path
+
+    def resolve(self, filename, touch=True):
+        """Map a requested file name to a stored clip path, or None.
+
+        Accepts sharded clip names and flat legacy files left in the root.
+        Only files inside the store are ever returned. ``touch`` counts the
+        lookup as a download.
+        """
+        name = os.path.basename(filename)
+        if not name or name.startswith('.') or name.endswith(('.part', PEAKS_SUFFIX)):
+            return None
+        candidates = [self.path_for(name)] if _CLIP_NAME.match(name) else []
+        candidates.append(os.path.join(self.root, name))
+        for path in candidates:
+            if os.path.isfile(path):
+                if touch:
+                    self.touch(name)
+                return path
+        return None
+
+    def touch(self, name):
+        """Mark a clip as recently downloaded."""
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE clips SET last_access = ?, downloads = downloads + 1 "
+                    "WHERE name = ?",
+                    (time.time(), name)
+                )
+        except sqlite3.Error as e:
+            logger.error(f"Could not update clip access time: {str(e)}")
+
+    def _remove(self, conn, name, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Could not remove clip {path}: {str(e)}")
+            return False
+        try:
+            os.remove(peaks_path(path))
+        except OSError:
+            pass
+        with conn:
+            conn.execute("DELETE FROM clips WHERE name = ?", (name,))
+        return True
+
+    def _needs_space(self, total):
+        if total > self.max_bytes:
+            return True
+        if self.min_free_bytes:
+            return shutil.disk_usage(self.root).free < self.min_free_bytes
+        return False
+
+    def evict(self):
+        """Enforce the age limit, then the size and free-space limits (LRU)."""
+        conn = self._connect()
+        removed = 0
+        cutoff = time.time() - self.max_age
+        for name, path in conn.execute(
+            "SELECT name, path FROM clips WHERE last_access < ?", (cutoff,)
+        ).fetchall():
+            removed += self._remove(conn, name, path)
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM clips").fetchone()[0]
+        if self._needs_space(total):
+            for name, path, size in conn.execute(
+                "SELECT name, path, size FROM clips ORDER BY last_access"
+            ).fetchall():
+                if not self._needs_space(total):
+                    break
+                if self._remove(conn, name, path):
+                    total -= size
+                    removed += 1
+
+        if removed:
+            logger.info(f"Clip store evicted {removed} clips")
+        return removed
+
+    def reconcile(self):
+        """Sync the index with the disk after crashes or manual changes.
+
+        Drops rows whose files are gone and indexes untracked clips
+        (including flat legacy files) so the evictor can see them.
+        """
+        conn = self._connect()
+        known = dict(conn.execute("SELECT name, path FROM clips").fetchall())
+        missing = [(name,) for name, path in known.items() if not os.path.exists(path)]
+        adopted = 0
+        now = time.time()
+        with conn:
+            conn.executemany("DELETE FROM clips WHERE name = ?", missing)
+            for directory, _, files in os.walk(self.root):
+                for name in files:
+                    path = os.path.join(directory, name)
+                    if name in known or name.endswith(('.part', PEAKS_SUFFIX)):
+                        continue
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    conn.execute(
+                        "INSERT OR IGNORE INTO clips "
+                        "(name, path, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                        (name, path, stat.st_size, stat.st_mtime, min(stat.st_mtime, now))
+                    )
+                    adopted += 1
+        if missing or adopted:
+            logger.info(f"Clip store reconciled: {len(missing)} dropped, {adopted} adopted")
+        return {'dropped': len(missing), 'adopted': adopted}
+
+    def clear(self):
+        """Delete every clip."""
+        conn = self._connect()
+        removed = 0
+        for name, path in conn.execute("SELECT name, path FROM clips").fetchall():
+            removed += self._remove(conn, name, path)
+        return removed
+
+    def stats(self):
+        """Clip count, bytes used and limits, read from the index."""
+        row = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(created_at), "
+            "COALESCE(SUM(downloads), 0) FROM clips"
+        ).fetchone()
+        return {
+            'clips': row[0],
+            'bytes': row[1],
+            'oldest': row[2],
+            'downloads': row[3],
+            'max_bytes': self.max_bytes,
+            'max_age': self.max_age
+        }
+
+
+def send_clip(store, filename):
+    """Build the download response for a stored clip, or None if missing.
+
+    Responses carry a strong ETag and Last-Modified and honour
+    conditional and Range requests. Content-addressed clips are cached as
+    immutable. With ``CLIP_SENDFILE_MODE`` set to ``x-accel`` or
+    ``x-sendfile`` the front proxy streams the file instead of a worker.
+    """
+    path = store.resolve(filename)
+    if not path:
+        return None
+    config = current_app.config
+    name = os.path.basename(path)
+    immutable = bool(_CLIP_NAME.match(name))
+    max_age = config.get('CLIP_CACHE_MAX_AGE', 31536000) if immutable else 3600
+    mode = config.get('CLIP_SENDFILE_MODE')
+
+    if mode in ('x-accel', 'x-sendfile'):
+        stat = os.stat(path)
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        )
+        if mode == 'x-accel':
+            relative = os.path.relpath(path, store.root).replace(os.sep, '/')
+            prefix = config.get('CLIP_ACCEL_PREFIX', '/protected-clips/').rstrip('/')
+            response.headers['X-Accel-Redirect'] = quote(f"{prefix}/{relative}")
+        else:
+            response.headers['X-Sendfile'] = path
+        response.headers['Content-Disposition'] = f'attachment; filename="{name}"'
+        response.set_etag(f"{stat.st_mtime}-{stat.st_size}-{adler32(path.encode()) & 0xffffffff}")
+        response.last_modified = stat.st_mtime
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        # The proxy serves ranges; here we only answer If-None-Match/If-Modified-Since
+        response.make_conditional(request)
+    else:
+        response = send_file(
+            path,
+            as_attachment=True,
+            download_name=name,
+            conditional=True,
+            etag=True,
+            max_age=max_age
+        )
+        response.cache_control.public = True
+
+    if immutable:
+        response.cache_control.immutable = True
+    return response
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_clip_store(app=None):
+    """Get the clip store for the current (or given) app, or None."""
+    if app is None:
+        if not has_app_context():
+            return None
+        app = current_app
+    config = app.config
+    root = config.get('UPLOAD_FOLDER', 'clips')
+    store = _stores.get(root)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(root)
+            if store is None:
+                try:
+                    store = ClipStore(
+                        root,
+                        config.get('CLIP_INDEX_PATH') or os.path.join(
+                            os.getcwd(), 'instance', 'clips.db'
+                        ),
+                        config.get('CLIP_STORE_MAX_BYTES', 5 * 1024 * 1024 * 1024),
+                        config.get('CLIP_MAX_AGE', 7 * 86400),
+                        min_free_bytes=config.get('CLIP_STORE_MIN_FREE_BYTES', 0)
+                    )
+                except (OSError, sqlite3.Error) as e:
+                    logger.error(f"Clip store unavailable: {str(e)}")
+                    return None
+                _stores[root] = store
+    return store
@@ -0,0 +1,141 @@
+"""Client for the shared question-answering model server."""
+import os
+import sys
+import time
+import socket
+import logging
+import threading
+import subprocess
+from flask import current_app, has_app_context
+from app.services.qa_model_server import send_message, recv_message
+
+logger = logging.getLogger(__name__)
+
+# Keep in sync with Config.AI_MODEL_VERSION / Config.AI_MODEL_CACHE defaults
+DEFAULT_QA_MODEL = 'distilbert-base-cased-distilled-squad-v1.1'
+DEFAULT_QA_SOCKET = '/tmp/audiosnipt-qa.sock'
+
+_SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'qa_model_server.py')
+
+
+class QAClient:
+    """Talks to the per-host QA model server, starting it on first use."""
+
+    def __init__(self, socket_path, model_name, cache_dir=None, timeout=30):
+        """Initialize QA client."""
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+
+    @classmethod
+    def from_env(cls):
+        """Build a client from environment variables (for gunicorn hooks)."""
+        return cls(
+            os.getenv('QA_SOCKET_PATH', DEFAULT_QA_SOCKET),
+            os.getenv('AI_MODEL_VERSION', DEFAULT_QA_MODEL),
+            cache_dir=os.getenv('AI_MODEL_CACHE', os.path.join(os.getcwd(), 'ai_models'))
+        )
+
+    def _connect(self, timeout):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _server_running(self):
+        """Whether a server is listening, counting a full backlog as up."""
+        try:
+            self._connect(1).close()
+        except (FileNotFoundError, ConnectionRefusedError):
+            return False
+        except OSError:
+            return True
+        return True
+
+    def _connect_retry(self, timeout, attempts=20):
+        """Connect, retrying briefly while the server's backlog is full."""
+        for attempt in range(attempts):
+            try:
+                return self._connect(timeout)
+            except BlockingIOError:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+
+    def ensure_server(self, start_timeout=30):
+        """Start the model server if nothing is listening on the socket.
+
+        A file lock next to the socket makes sure only one process per host
+        spawns the server; the others wait for it to come up.
+        """
+        if self._server_running():
+            return
+
+        import fcntl
+        with open(self.socket_path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if self._server_running():
+                return
+
+            logger.info(f"Starting QA model server on {self.socket_path}")
+            command = [
+                sys.executable, _SERVER_SCRIPT,
+                '--socket', self.socket_path,
+                '--model', self.model_name
+            ]
+            if self.cache_dir:
+                command += ['--cache-dir', self.cache_dir]
+            subprocess.Popen(command, start_new_session=True, close_fds=True)
+
+            deadline = time.monotonic() + start_timeout
+            while time.monotonic() < deadline:
+                if self._server_running():
+                    return
+                time.sleep(0.1)
+        raise RuntimeError("QA model server did not start")
+
+    def _request(self, payload, timeout=None):
+        self.ensure_server()
+        with self._connect_retry(timeout or self.timeout) as sock:
+            send_message(sock, payload)
+            response = recv_message(sock)
+        if response is None:
+            raise RuntimeError("QA model server closed the connection")
+        if 'error' in response:
+            raise RuntimeError(f"QA model error: {response['error']}")
+        return response
+
+    def answer(self, question, context):
+        """Answer a question about a context string."""
+        return self._request({'op': 'answer', 'question': question, 'context': context})
+
+    def warmup(self, timeout=600):
+        """Load the model in the server and run one inference."""
+        return self._request({'op': 'warmup'}, timeout=timeout)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_qa_client():
+    """Get the QA client configured for this app."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if has_app_context():
+                    config = current_app.config
+                    _client = QAClient(
+                        config.get('QA_SOCKET_PATH', DEFAULT_QA_SOCKET),
+                        config.get('AI_MODEL_VERSION', DEFAULT_QA_MODEL),
+                        cache_dir=config.get('AI_MODEL_CACHE')
+                    )
+                else:
+                    _client = QAClient.from_env()
+    return _client
@@ -0,0 +1,255 @@
+"""Shared question-answering model server.
+
+Runs as a separate local process (one per host) and serves the
+``AI_MODEL_VERSION`` question-answering pipeline over a Unix socket, so web
+workers never import torch or hold their own copy of the model.
+
+Concurrent requests are micro-batched: the first request opens a short
+batching window and everything that arrives before it closes (or until the
+batch is full) goes through the pipeline in one call.
+
+Usage: python -m app.services.qa_model_server --socket PATH --model NAME
+"""
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import struct
+import logging
+import argparse
+import threading
+import socketserver
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct('>I')
+MAX_MESSAGE_BYTES = 8 * 1024 * 1024
+
+
+def send_message(sock, payload):
+    """Send one length-prefixed JSON message."""
+    data = json.dumps(payload, separators=(',', ':')).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock):
+    """Receive one length-prefixed JSON message, or None on EOF."""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message too large ({length} bytes)")
+    data = _recv_exact(sock, length)
+    if data is None:
+        return None
+    return json.loads(data)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class _Pending:
+    """A queued inference request waiting for its batch to run."""
+
+    __slots__ = ('question', 'context', 'done', 'result')
+
+    def __init__(self, question, context):
+        self.question = question
+        self.context = context
+        self.done = threading.Event()
+        self.result = None
+
+
+class ModelBatcher:
+    """Loads the model on first use and runs requests in micro-batches."""
+
+    def __init__(self, model_name, cache_dir=None, max_batch=16, window_ms=10):
+        """Initialize batcher."""
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.max_batch = max_batch
+        self.window = window_ms / 1000.0
+        self._queue = queue.Queue()
+        self._pipeline = None
+        self._load_lock = threading.Lock()
+        thread = threading.Thread(target=self._run, name='qa-batcher', daemon=True)
+        thread.start()
+
+    def _load(self):
+        with self._load_lock:
+            if self._pipeline is None:
+                logger.info(f"Loading QA model {self.model_name}")
+                import torch
+                from transformers import pipeline
+                self._pipeline = pipeline(
+                    "question-answering",
+                    model=self.model_name,
+                    model_kwargs={'cache_dir': self.cache_dir} if self.cache_dir else {},
+                    device_map="auto",
+                    torch_dtype=(
+                        torch.float16 if torch.cuda.is_available() else torch.float32
+                    )
+                )
+                logger.info("QA model loaded")
+        return self._pipeline
+
+    def warmup(self):
+        """Load the model and run one tiny inference."""
+        self.submit('What is warming up?', 'The model is warming up.')
+
+    def submit(self, question, context, timeout=None):
+        """Queue one request and wait for its batch to finish."""
+        pending = _Pending(question, context)
+        self._queue.put(pending)
+        if not pending.done.wait(timeout):
+            raise TimeoutError("QA inference timed out")
+        return pending.result
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._infer(batch)
+
+    def _infer(self, batch):
+        try:
+            qa = self._load()
+            outputs = qa(
+                question=[p.question for p in batch],
+                context=[p.context for p in batch],
+                batch_size=len(batch)
+            )
+            if isinstance(outputs, dict):
+                outputs = [outputs]
+            for pending, output in zip(batch, outputs):
+                pending.result = {
+                    'answer': output['answer'],
+                    'score': float(output['score']),
+                    'start': int(output['start']),
+                    'end': int(output['end'])
+                }
+        except Exception as e:
+            logger.exception("QA inference failed")
+            for pending in batch:
+                pending.result = {'error': str(e)}
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        batcher = self.server.batcher
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (OSError, ValueError) as e:
+                logger.error(f"Bad QA request: {str(e)}")
+                return
+            if message is None:
+                return
+
+            op = message.get('op')
+            try:
+                if op == 'answer':
+                    response = batcher.submit(message['question'], message['context'])
+                elif op == 'warmup':
+                    batcher.warmup()
+                    response = {'ok': True}
+                elif op == 'ping':
+                    response = {'ok': True, 'model': batcher.model_name}
+                else:
+                    response = {'error': f"Unknown op: {op}"}
+            except Exception as e:
+                response = {'error': str(e)}
+
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class QAModelServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server in front of a ModelBatcher."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, socket_path, batcher):
+        """Bind the socket, replacing a stale one left by a dead server."""
+        if os.path.exists(socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(socket_path)
+                running = True
+            except (FileNotFoundError, ConnectionRefusedError):
+                running = False
+            except OSError:
+                # Backlog full: a live server is just busy
+                running = True
+            finally:
+                probe.close()
+            if running:
+                raise RuntimeError(f"QA model server already running on {socket_path}")
+            os.unlink(socket_path)
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+        self.batcher = batcher
+
+
+def main():
+    """Run the QA model server."""
+    parser = argparse.ArgumentParser(description='Shared QA model server')
+    parser.add_argument('--socket', required=True, help='Unix socket path')
+    parser.add_argument('--model', required=True, help='Model name or path')
+    parser.add_argument('--cache-dir', default=None, help='Model cache directory')
+    parser.add_argument('--max-batch', type=int, default=16)
+    parser.add_argument('--window-ms', type=float, default=10)
+    parser.add_argument('--warmup', action='store_true', help='Load the model at startup')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+        handlers=[logging.StreamHandler(sys.stdout)]
+    )
+
+    batcher = ModelBatcher(
+        args.model,
+        cache_dir=args.cache_dir,
+        max_batch=args.max_batch,
+        window_ms=args.window_ms
+    )
+    server = QAModelServer(args.socket, batcher)
+    logger.info(f"QA model server listening on {args.socket}")
+    if args.warmup:
+        threading.Thread(target=batcher.warmup, daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
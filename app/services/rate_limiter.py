@@ -0,0 +1,185 @@
+"""Token-bucket rate limiting for the search, clip and quota routes."""
+import math
+import logging
+import threading
+from functools import wraps
+from flask import current_app, request, jsonify
+from app.extensions import get_redis_client
+from app.services.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# Refill and take ``cost`` tokens from every bucket in KEYS[2..n], or from
+# none of them. KEYS[1] is the metrics hash. ARGV: scope, cost, then a
+# (rate per second, burst) pair per bucket. Returns {allowed, retry_ms}.
+_BUCKET_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local scope = ARGV[1]
+local cost = tonumber(ARGV[2])
+local levels = {}
+local retry = 0
+for i = 2, #KEYS do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(now - ts, 0) * rate)
+    levels[i] = tokens
+    if tokens < cost then
+        retry = math.max(retry, (cost - tokens) / rate)
+    end
+end
+if retry > 0 then
+    redis.call('HINCRBY', KEYS[1], scope .. ':rejected', 1)
+    return {0, math.ceil(retry * 1000)}
+end
+for i = 2, #KEYS do
+    local rate = tonumber(ARGV[2 * i - 1])
+    local burst = tonumber(ARGV[2 * i])
+    redis.call('HSET', KEYS[i], 'tokens', tostring(levels[i] - cost), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[i], math.ceil(burst / rate * 1000) + 1000)
+end
+redis.call('HINCRBY', KEYS[1], scope .. ':allowed', 1)
+return {1, 0}
+"""
+
+
+class RateLimiter:
+    """Per-IP and per-token token buckets checked in one script call.
+
+    Each scope (``search``, ``clip``, ``quota``) has its own refill rate
+    and burst, set in config as ``RATE_LIMIT_<SCOPE>_RATE`` (tokens per
+    second) and ``RATE_LIMIT_<SCOPE>_BURST``. A request must find a token
+    in both its IP bucket and, when it carries one, its subscription
+    token's bucket. If Redis is unavailable requests are let through.
+    """
+
+    KEY_PREFIX = 'ratelimit:'
+    METRICS_KEY = 'ratelimit:metrics'
+
+    def __init__(self):
+        """Initialize rate limiter."""
+        self.breaker = CircuitBreaker('rate-limit')
+        self._scripts = {}
+        self._lock = threading.Lock()
+        self._stats = {'unchecked': 0}
+
+    def _script(self, client):
+        script = self._scripts.get(id(client))
+        if script is None:
+            script = client.register_script(_BUCKET_SCRIPT)
+            self._scripts[id(client)] = script
+        return script
+
+    def _budget(self, scope):
+        config = current_app.config
+        name = scope.upper()
+        return (
+            float(config.get(f'RATE_LIMIT_{name}_RATE', 1.0)),
+            int(config.get(f'RATE_LIMIT_{name}_BURST', 10))
+        )
+
+    def hit(self, scope, identities, cost=1):
+        """Take ``cost`` tokens for every identity, e.g. ``['ip:1.2.3.4']``.
+
+        Returns ``(allowed, retry_after_seconds)``.
+        """
+        client = get_redis_client() if self.breaker.allow() else None
+        if client is not None:
+            rate, burst = self._budget(scope)
+            keys = [self.METRICS_KEY] + [
+                f"{self.KEY_PREFIX}{scope}:{identity}" for identity in identities
+            ]
+            args = [scope, cost]
+            for _ in identities:
+                args += [rate, burst]
+            try:
+                allowed, retry_ms = self._script(client)(keys=keys, args=args)
+                self.breaker.record_success()
+                return bool(allowed), math.ceil(retry_ms / 1000)
+            except Exception as e:
+                logger.error(f"Rate limit check failed, allowing request: {str(e)}")
+                self.breaker.record_failure(probe=client.ping)
+        with self._lock:
+            self._stats['unchecked'] += 1
+        return True, 0
+
+    def stats(self):
+        """Allowed/rejected counters per scope (all workers) and local misses."""
+        counters = {}
+        client = get_redis_client()
+        if client is not None:
+            try:
+                counters = {
+                    key.decode(): int(value)
+                    for key, value in client.hgetall(self.METRICS_KEY).items()
+                }
+            except Exception as e:
+                logger.error(f"Rate limit metrics read failed: {str(e)}")
+        with self._lock:
+            local = dict(self._stats)
+        return {'counters': counters, 'process': local, 'breaker': self.breaker.stats()}
+
+
+rate_limiter = RateLimiter()
+
+
+def client_ip():
+    """Client address as recorded by the outermost trusted proxy.
+
+    Entries left of the ``TRUSTED_PROXY_COUNT`` hops in X-Forwarded-For
+    were sent by the client and can be anything, so they are ignored.
+    """
+    hops = current_app.config.get('TRUSTED_PROXY_COUNT', 1)
+    forwarded = request.access_route if request.headers.get('X-Forwarded-For') else []
+    if hops and len(forwarded) >= hops:
+        return forwarded[-hops]
+    return request.remote_addr
+
+
+def _request_token():
+    """Subscription token of the current request, wherever it was sent."""
+    token = request.headers.get('X-Search-Token', '')
+    if not token and request.is_json:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            token = data.get('token') or ''
+    return str(token).strip()
+
+
+def check_rate_limit(scope, cost=1):
+    """Take ``cost`` from the request's buckets for ``scope``.
+
+    Returns None when allowed, else a 429 response with Retry-After.
+    """
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return None
+    identities = [f"ip:{client_ip()}"]
+    token = _request_token()
+    if token:
+        identities.append(f"token:{token}")
+    allowed, retry_after = rate_limiter.hit(scope, identities, cost)
+    if allowed:
+        return None
+    response = jsonify({
+        'success': False,
+        'error': 'Too many requests, please slow down'
+    })
+    response.headers['Retry-After'] = str(max(retry_after, 1))
+    return response, 429
+
+
+def rate_limited(scope, cost=1):
+    """Reject requests over the scope's budget with 429 and Retry-After."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            rejected = check_rate_limit(scope, cost)
+            if rejected:
+                return rejected
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
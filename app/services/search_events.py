@@ -0,0 +1,163 @@
+"""Search events: capped Redis stream drained into the search_logs table."""
+import os
+import time
+import uuid
+import socket
+import logging
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.extensions import db, get_redis_client
+from app.models import SearchLog
+
+logger = logging.getLogger(__name__)
+
+STREAM_KEY = 'search_events'
+GROUP = 'search_log_writers'
+
+# Delivered-but-unacknowledged events older than this belong to a writer
+# that died mid-batch and are claimed again
+_RECLAIM_IDLE_MS = 5 * 60 * 1000
+
+
+def record_search_event(query, success, token=None, ip_address=None, error=None):
+    """Append one search event to the stream; never touches the database.
+
+    The stream is trimmed (approximately) to ``SEARCH_EVENTS_MAXLEN``
+    entries, so Redis memory stays bounded if the writer falls behind.
+    Returns False when the event could not be recorded.
+    """
+    client = get_redis_client()
+    if client is None:
+        return False
+    fields = {
+        'id': uuid.uuid4().hex,
+        'q': (query or '')[:500],
+        'ok': '1' if success else '0',
+        'tok': token or '',
+        'ip': ip_address or '',
+        'ts': f"{time.time():.3f}",
+        'err': (error or '')[:500]
+    }
+    try:
+        client.xadd(
+            STREAM_KEY, fields,
+            maxlen=current_app.config.get('SEARCH_EVENTS_MAXLEN', 100000),
+            approximate=True
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Failed to record search event: {str(e)}")
+        return False
+
+
+def _ensure_group(client):
+    try:
+        client.xgroup_create(STREAM_KEY, GROUP, id='0', mkstream=True)
+    except Exception as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def _row(fields):
+    """Map stream fields (bytes) to a search_logs row."""
+    get = lambda name: fields.get(name.encode(), b'').decode(errors='replace')
+    return {
+        'event_id': get('id'),
+        'query': get('q'),
+        'token': get('tok')[:100] or None,
+        'ip_address': get('ip')[:45] or None,
+        'timestamp': datetime.utcfromtimestamp(float(get('ts') or 0)),
+        'success': get('ok') == '1',
+        'error': get('err') or None
+    }
+
+
+def _insert_ignoring_duplicates(rows):
+    """Bulk insert rows, skipping events already stored (redeliveries)."""
+    table = SearchLog.__table__
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        statement = postgresql_insert(table).on_conflict_do_nothing(index_elements=['event_id'])
+    elif dialect == 'sqlite':
+        statement = sqlite_insert(table).on_conflict_do_nothing(index_elements=['event_id'])
+    else:
+        statement = table.insert()
+    # A list of parameter sets runs as one executemany
+    db.session.execute(statement, rows)
+    db.session.commit()
+
+
+def _persist(client, entries):
+    """Write a batch and acknowledge it only once it is committed."""
+    ids, rows = [], []
+    for entry_id, fields in entries:
+        ids.append(entry_id)
+        # Entries trimmed away while pending come back without fields
+        if fields and fields.get(b'id'):
+            rows.append(_row(fields))
+    if rows:
+        try:
+            _insert_ignoring_duplicates(rows)
+        except Exception:
+            db.session.rollback()
+            raise
+    if ids:
+        client.xack(STREAM_KEY, GROUP, *ids)
+    return len(rows)
+
+
+def drain_search_events():
+    """Move pending search events into search_logs in batches.
+
+    Runs in the scheduler. Delivery is at least once: events are acked
+    after their batch commits, batches left unacked by a crashed writer
+    are reclaimed, and the unique ``event_id`` drops the duplicates.
+    Returns the number of rows written.
+    """
+    client = get_redis_client()
+    if client is None:
+        return 0
+    config = current_app.config
+    batch_size = config.get('SEARCH_EVENTS_BATCH', 500)
+    max_batches = config.get('SEARCH_EVENTS_MAX_BATCHES', 20)
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    written = 0
+    try:
+        _ensure_group(client)
+        claimed = client.xautoclaim(
+            STREAM_KEY, GROUP, consumer, _RECLAIM_IDLE_MS, start_id='0-0', count=batch_size
+        )
+        if claimed[1]:
+            written += _persist(client, claimed[1])
+        for _ in range(max_batches):
+            response = client.xreadgroup(GROUP, consumer, {STREAM_KEY: '>'}, count=batch_size)
+            if not response:
+                break
+            entries = response[0][1]
+            written += _persist(client, entries)
+            if len(entries) < batch_size:
+                break
+    except Exception as e:
+        logger.error(f"Search event drain failed: {str(e)}", exc_info=True)
+    if written:
+        logger.info(f"Stored {written} search events")
+    return written
+
+
+def search_event_stats():
+    """Stream length and events waiting to be stored."""
+    client = get_redis_client()
+    if client is None:
+        return None
+    try:
+        length = client.xlen(STREAM_KEY)
+        lag = None
+        for group in client.xinfo_groups(STREAM_KEY):
+            if group['name'] in (GROUP, GROUP.encode()):
+                lag = {'pending': group['pending'], 'lag': group.get('lag')}
+        return {'length': length, 'group': lag}
+    except Exception as e:
+        logger.error(f"Search event stats failed: {str(e)}")
+        return None
@@ -0,0 +1,141 @@
+"""Background search jobs with progress stored in the cache."""
+import os
+import uuid
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from app.extensions import cache
+from app.services.search_manager import get_search_manager
+from app.services.video_matcher import iter_video_matches, match_video
+from app.services.youtube_search import search_videos
+from app.services.transcript_index import lookup_local
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_job_executor():
+    """Get the bounded search job executor for this process."""
+    global _executor, _executor_pid
+    if _executor is not None and _executor_pid == os.getpid():
+        return _executor
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            max_workers = current_app.config.get('SEARCH_JOB_WORKERS', 4)
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='search-job'
+            )
+            _executor_pid = os.getpid()
+            logger.info(f"Search job executor started ({max_workers} workers)")
+    return _executor
+
+
+def _job_key(job_id):
+    return f"search_job:{job_id}"
+
+
+def get_job(job_id):
+    """Get a search job's state, or None if unknown or expired."""
+    return cache.get(_job_key(job_id))
+
+
+def _save_job(job):
+    job['updated'] = datetime.utcnow().isoformat()
+    cache.set(
+        _job_key(job['id']),
+        job,
+        timeout=current_app.config.get('SEARCH_JOB_TTL', 3600)
+    )
+
+
+def submit_search_job(youtube, person_name, search_word, token=None, ip_address=None):
+    """Queue a search job and return its ID."""
+    job = {
+        'id': uuid.uuid4().hex,
+        'status': 'queued',
+        'person_name': person_name,
+        'search_word': search_word,
+        'progress': {'done': 0, 'total': 0},
+        'results': [],
+        'error': None,
+        'created': datetime.utcnow().isoformat()
+    }
+    _save_job(job)
+
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            _run_search_job(job, youtube, token, ip_address)
+
+    get_job_executor().submit(run)
+    return job['id']
+
+
+def _run_search_job(job, youtube, token, ip_address):
+    """Run a search job, publishing partial results as videos complete."""
+    search_word = job['search_word']
+    try:
+        job['status'] = 'running'
+        _save_job(job)
+
+        local = lookup_local(job['person_name'], search_word)
+        if local is not None:
+            items = []
+            job['results'] = local
+            job['progress'] = {'done': len(local), 'total': len(local)}
+        else:
+            items = search_videos(youtube, job['person_name'], search_word)
+            job['progress']['total'] = len(items)
+        _save_job(job)
+
+        processed = []
+
+        def matcher(item):
+            try:
+                return match_video(item, search_word)
+            finally:
+                processed.append(item)
+
+        found = dict(enumerate(job['results']))
+        for rank, video in iter_video_matches(items, matcher):
+            found[rank] = video
+            job['results'] = [found[r] for r in sorted(found)]
+            job['progress']['done'] = len(processed)
+            _save_job(job)
+        if items:
+            job['progress']['done'] = len(processed)
+
+        job['status'] = 'done'
+        _save_job(job)
+        get_search_manager().log_search(
+            f"{job['person_name']}: {search_word}", True, token, ip_address
+        )
+        logger.info(f"Search job {job['id']} finished with {len(found)} videos")
+
+    except Exception as e:
+        logger.error(f"Search job {job['id']} failed: {str(e)}", exc_info=True)
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        try:
+            _save_job(job)
+        except Exception as save_error:
+            logger.error(f"Failed to save search job state: {str(save_error)}")
+        # The search was charged when the job was queued
+        search_mgr = get_search_manager()
+        try:
+            if token:
+                search_mgr.refund_subscription_usage(token)
+            else:
+                search_mgr.refund_free_usage(ip_address)
+        except Exception as refund_error:
+            logger.error(f"Failed to refund search usage: {str(refund_error)}")
+        search_mgr.log_search(
+            f"{job['person_name']}: {search_word}", False, token, ip_address, str(e)
+        )
@@ -1,23 +1,19 @@
 """Unified search management service."""
 from datetime import datetime, timedelta
+import time
 import hmac
 import hashlib
 import logging
+import os
+import threading
 from flask import current_app
-from app.extensions import db, cache
+from app.extensions import db
+from app.services.usage_counters import usage_counters
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.search_events import record_search_event
 
 logger = logging.getLogger(__name__)
 
-def safe_cache_operation(operation):
-    """Decorator for safe cache operations with fallback."""
-    def wrapper(*args, **kwargs):
-        try:
-            return operation(*args, **kwargs)
-        except Exception as e:
-            logger.error(f"Cache operation failed: {str(e)}")
-            return None
-    return wrapper
-
 class SearchTier:
     """Search tier configuration."""
     FREE = {
@@ -47,25 +43,32 @@ class SearchTier:
 
 class SearchManager:
     """Manages search limits, tokens, and usage tracking."""
+
+    # Batch phrases answered by the local index are charged one search per
+    # started group; phrases needing a YouTube search are charged in full
+    BATCH_PHRASES_PER_SEARCH = 5
     
     def __init__(self):
-        """Initialize search manager."""
-        self.token_secret = current_app.config.get('TOKEN_SECRET', 'your-secret-key-here')
-        self._verify_cache_connection()
-        
-    def _verify_cache_connection(self):
-        """Verify Redis cache connection."""
-        try:
-            cache.set('_test_key', 'test_value', timeout=1)
-            test_result = cache.get('_test_key')
-            if test_result != 'test_value':
-                logger.error("Cache verification failed - values don't match")
-                self._use_fallback = True
-            else:
-                self._use_fallback = False
-        except Exception as e:
-            logger.error(f"Cache verification failed: {str(e)}")
-            self._use_fallback = True
+        """Initialize search manager.
+
+        Long-lived: use ``get_search_manager`` for the one owned by this
+        worker process. Redis health is tracked by ``cache_breaker`` from
+        the outcome of real usage calls rather than probed per request.
+        """
+        config = current_app.config
+        self.token_secret = config.get('TOKEN_SECRET', 'your-secret-key-here')
+        self.cache_breaker = CircuitBreaker(
+            'search-cache',
+            failure_threshold=config.get('CACHE_BREAKER_FAILURES', 3),
+            base_delay=config.get('CACHE_BREAKER_BASE_DELAY', 1.0),
+            max_delay=config.get('CACHE_BREAKER_MAX_DELAY', 60.0)
+        )
+        usage_counters.breaker = self.cache_breaker
+
+    @property
+    def cache_available(self):
+        """Whether usage is currently counted in Redis (breaker closed)."""
+        return self.cache_breaker.state == CircuitBreaker.CLOSED
         
     def _generate_token(self, tier_name, expiry_date, search_limit):
         """Generate a signed token for a search tier."""
@@ -101,65 +104,72 @@ class SearchManager:
             logger.error(f"Token validation error: {e}")
         return {'valid': False}
         
-    @safe_cache_operation
+    def _free_key(self, ip_address):
+        return f"free_searches:{ip_address}"
+
+    def _token_key(self, token):
+        return f"token_usage:{token}"
+
+    def _free_status(self, counter):
+        # A window that has not started is reported as starting this minute,
+        # so repeated status checks stay identical (and cacheable)
+        expiry = counter['expires'] or (
+            time.time() // 60 * 60 + SearchTier.FREE['duration'].total_seconds()
+        )
+        return {
+            'allowed': counter['allowed'],
+            'used': counter['used'],
+            'remaining': counter['remaining'],
+            'expires': datetime.utcfromtimestamp(expiry).isoformat()
+        }
+
+    def _token_window(self, token_data):
+        """Seconds a token's usage counter lives: until the token expires."""
+        return (token_data['expiry'] - datetime.utcnow()).total_seconds()
+
     def get_free_searches(self, ip_address):
         """Get remaining free searches for an IP address."""
-        if self._use_fallback:
-            # Fallback to default values if cache is unavailable
-            expiry = datetime.utcnow() + SearchTier.FREE['duration']
-            return {
-                'used': 0,
-                'remaining': SearchTier.FREE['limit'],
-                'expires': expiry.isoformat()
-            }
-            
-        cache_key = f"free_searches:{ip_address}"
-        usage = cache.get(cache_key)
-        
-        if usage is None:
-            expiry = datetime.utcnow() + SearchTier.FREE['duration']
-            usage = {
-                'used': 0,
-                'remaining': SearchTier.FREE['limit'],
-                'expires': expiry.isoformat()
-            }
-            cache.set(cache_key, usage, timeout=86400)
-        
-        try:
-            expiry = datetime.fromisoformat(usage['expires'])
-            if expiry < datetime.utcnow():
-                expiry = datetime.utcnow() + SearchTier.FREE['duration']
-                usage = {
-                    'used': 0,
-                    'remaining': SearchTier.FREE['limit'],
-                    'expires': expiry.isoformat()
-                }
-                cache.set(cache_key, usage, timeout=86400)
-        except (TypeError, ValueError) as e:
-            logger.error(f"Invalid expiry format: {e}")
-            expiry = datetime.utcnow() + SearchTier.FREE['duration']
-            usage = {
-                'used': 0,
-                'remaining': SearchTier.FREE['limit'],
-                'expires': expiry.isoformat()
-            }
-            cache.set(cache_key, usage, timeout=86400)
-        
-        return usage
-        
-    @safe_cache_operation
-    def increment_free_usage(self, ip_address):
+        counter = usage_counters.peek(
+            self._free_key(ip_address),
+            SearchTier.FREE['limit'],
+            SearchTier.FREE['duration'].total_seconds()
+        )
+        return self._free_status(counter)
+
+    def charge_free_usage(self, ip_address, amount=1):
+        """Charge free searches if they fit, in one atomic step.
+
+        Returns ``{'allowed', 'used', 'remaining', 'expires'}``.
+        """
+        counter = usage_counters.charge(
+            self._free_key(ip_address),
+            amount,
+            SearchTier.FREE['limit'],
+            SearchTier.FREE['duration'].total_seconds()
+        )
+        return self._free_status(counter)
+
+    def increment_free_usage(self, ip_address, amount=1):
         """Increment usage count for free tier."""
-        if self._use_fallback:
-            return True  # Allow searches when cache is down
-            
-        usage = self.get_free_searches(ip_address)
-        if usage and usage['remaining'] > 0:
-            usage['used'] += 1
-            usage['remaining'] -= 1
-            cache.set(f"free_searches:{ip_address}", usage, timeout=86400)
-            return True
-        return False
+        return self.charge_free_usage(ip_address, amount)['allowed']
+
+    def refund_free_usage(self, ip_address, amount=1):
+        """Give free searches back after a charged search failed."""
+        usage_counters.refund(
+            self._free_key(ip_address),
+            amount,
+            SearchTier.FREE['limit'],
+            SearchTier.FREE['duration'].total_seconds()
+        )
+
+    def batch_search_cost(self, local_count, remote_count=0):
+        """Get the number of searches charged for a multi-phrase batch.
+
+        ``local_count`` phrases are served from the local index and
+        ``remote_count`` need their own YouTube search.
+        """
+        local_cost = -(-local_count // self.BATCH_PHRASES_PER_SEARCH)
+        return max(1, local_cost + remote_count)
         
     def create_subscription_token(self, tier_name):
         """Create a new subscription token."""
@@ -173,64 +183,115 @@ class SearchManager:
             expiry.isoformat(),
             tier['limit']
         )
-        
-    def check_subscription(self, token):
-        """Check subscription status and remaining searches."""
+
+    def _subscription_status(self, token, amount):
         if not token:
             return {'valid': False, 'error': 'No token provided'}
             
         token_data = self._validate_token(token)
         if not token_data['valid']:
             return {'valid': False, 'error': 'Invalid token'}
-            
-        # Get usage from cache
-        cache_key = f"token_usage:{token}"
-        usage = cache.get(cache_key) or {'used': 0}
-        
-        remaining = token_data['limit'] - usage['used']
-        if remaining <= 0:
-            return {'valid': False, 'error': 'Search limit reached'}
-            
+
+        counter = usage_counters.charge(
+            self._token_key(token), amount, token_data['limit'],
+            self._token_window(token_data)
+        )
         return {
             'valid': True,
+            'allowed': counter['allowed'],
             'tier': token_data['tier'],
-            'used': usage['used'],
-            'remaining': remaining,
+            'used': counter['used'],
+            'remaining': counter['remaining'],
             'expires': token_data['expiry'].isoformat()
         }
         
-    @safe_cache_operation
-    def increment_subscription_usage(self, token):
+    def check_subscription(self, token):
+        """Check subscription status and remaining searches."""
+        status = self._subscription_status(token, 0)
+        if status['valid'] and status['remaining'] <= 0:
+            return {'valid': False, 'error': 'Search limit reached'}
+        return status
+
+    def charge_subscription(self, token, amount=1):
+        """Validate a token and charge its searches in one atomic step.
+
+        Returns the subscription status; ``allowed`` is False (and nothing
+        is charged) when the searches do not fit in the remaining limit.
+        """
+        return self._subscription_status(token, amount)
+        
+    def increment_subscription_usage(self, token, amount=1):
         """Increment usage count for subscription."""
-        if self._use_fallback:
-            return True  # Allow searches when cache is down
-            
+        status = self._subscription_status(token, amount)
+        return status['valid'] and status['allowed']
+
+    def refund_subscription_usage(self, token, amount=1):
+        """Give searches back after a charged search failed."""
         token_data = self._validate_token(token)
-        if not token_data['valid']:
-            return False
-            
-        cache_key = f"token_usage:{token}"
-        usage = cache.get(cache_key) or {'used': 0}
-        
-        if usage['used'] < token_data['limit']:
-            usage['used'] += 1
-            cache.set(cache_key, usage, timeout=86400)  # 24 hours
-            return True
-        return False
-        
-    def log_search(self, query, success, token=None, ip_address=None):
-        """Log search attempt."""
-        try:
-            log_data = {
-                'query': query,
-                'success': success,
-                'timestamp': datetime.utcnow(),
-                'token': token,
-                'ip_address': ip_address
-            }
-            # Store in Redis for analytics
-            cache.rpush('search_logs', str(log_data))
-            return True
-        except Exception as e:
-            logger.error(f"Error logging search: {e}")
-            return False 
\ No newline at end of file
+        if token_data['valid']:
+            usage_counters.refund(
+                self._token_key(token), amount, token_data['limit'],
+                self._token_window(token_data)
+            )
+
+    def quota_status(self, token, ip_address):
+        """Usage shown to a visitor, read in one pipelined round trip.
+
+        Reports the subscription while the token is valid and has searches
+        left, otherwise the free tier of ``ip_address``. Returns
+        ``{'tier', 'searches_used', 'searches_remaining', 'expires'}``.
+        """
+        token_data = self._validate_token(token) if token else {'valid': False}
+        free_counter = (
+            self._free_key(ip_address),
+            SearchTier.FREE['limit'],
+            SearchTier.FREE['duration'].total_seconds()
+        )
+        if token_data['valid']:
+            token_counter = (
+                self._token_key(token), token_data['limit'], self._token_window(token_data)
+            )
+            subscription, free = usage_counters.peek_many([token_counter, free_counter])
+            if subscription['remaining'] > 0:
+                return {
+                    'tier': token_data['tier'],
+                    'searches_used': subscription['used'],
+                    'searches_remaining': subscription['remaining'],
+                    'expires': token_data['expiry'].isoformat()
+                }
+        else:
+            free, = usage_counters.peek_many([free_counter])
+        status = self._free_status(free)
+        return {
+            'tier': SearchTier.FREE['name'],
+            'searches_used': status['used'],
+            'searches_remaining': status['remaining'],
+            'expires': status['expires']
+        }
+
+    def log_search(self, query, success, token=None, ip_address=None, error=None):
+        """Log search attempt.
+
+        Queues the event on a capped Redis stream; the scheduler writes
+        queued events to the search_logs table in batches.
+        """
+        return record_search_event(
+            query, success, token=token, ip_address=ip_address, error=error
+        )
+
+
+_manager = None
+_manager_pid = None
+_manager_lock = threading.Lock()
+
+
+def get_search_manager():
+    """Get this worker process's search manager, creating it on first use."""
+    global _manager, _manager_pid
+    if _manager is not None and _manager_pid == os.getpid():
+        return _manager
+    with _manager_lock:
+        if _manager is None or _manager_pid != os.getpid():
+            _manager = SearchManager()
+            _manager_pid = os.getpid()
+    return _manager
@@ -0,0 +1,91 @@
+"""Cross-worker request coalescing backed by Redis."""
+import json
+import time
+import uuid
+import hashlib
+import logging
+from app.extensions import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Delete the lock only if we still own it
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Run a computation once per key across all workers.
+
+    The first caller takes a Redis lock and computes the result, then
+    publishes it under a short-lived result key. Concurrent callers with the
+    same key poll for that result instead of repeating the work. If the
+    leader fails, a follower takes over the lock; if nothing shows up before
+    ``wait_timeout``, the follower computes the result itself.
+    """
+
+    LOCK_PREFIX = 'singleflight:lock:'
+    RESULT_PREFIX = 'singleflight:result:'
+
+    def __init__(self, namespace, lock_ttl=30, wait_timeout=20, result_ttl=15):
+        """Initialize single-flight group."""
+        self.namespace = namespace
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.result_ttl = result_ttl
+
+    def _keys(self, key):
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        suffix = f"{self.namespace}:{digest}"
+        return self.LOCK_PREFIX + suffix, self.RESULT_PREFIX + suffix
+
+    def do(self, key, compute):
+        """Return ``compute()``'s JSON-serializable result for ``key``."""
+        client = get_redis_client()
+        if client is None:
+            return compute()
+
+        lock_key, result_key = self._keys(key)
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.05
+
+        while True:
+            try:
+                raw = client.get(result_key)
+                if raw is not None:
+                    return json.loads(raw)
+                acquired = client.set(lock_key, token, nx=True, ex=self.lock_ttl)
+            except Exception as e:
+                logger.error(f"Single-flight coordination failed: {str(e)}")
+                return compute()
+
+            if acquired:
+                return self._lead(client, lock_key, result_key, token, compute)
+
+            if time.monotonic() >= deadline:
+                logger.warning(f"Single-flight wait timed out for {self.namespace}")
+                return compute()
+            time.sleep(delay)
+            delay = min(delay * 1.5, 0.5)
+
+    def _lead(self, client, lock_key, result_key, token, compute):
+        try:
+            result = compute()
+            try:
+                client.set(
+                    result_key,
+                    json.dumps(result, separators=(',', ':')),
+                    ex=self.result_ttl
+                )
+            except Exception as e:
+                logger.error(f"Failed to publish single-flight result: {str(e)}")
+            return result
+        finally:
+            try:
+                client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                logger.error(f"Failed to release single-flight lock: {str(e)}")
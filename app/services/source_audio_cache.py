@@ -0,0 +1,378 @@
+"""Disk cache of full source audio tracks used to cut follow-up clips."""
+import os
+import time
+import glob
+import fcntl
+import hashlib
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import yt_dlp
+from flask import current_app, has_app_context
+from app.utils.waveform import peaks_path, try_generate_peaks
+
+logger = logging.getLogger(__name__)
+
+# Native audio is kept as downloaded (no transcode); m4a seeks well in ffmpeg
+DEFAULT_SOURCE_FORMAT = 'bestaudio[ext=m4a]/bestaudio/best'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    key TEXT PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    format TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_sources_last_access ON sources (last_access);
+CREATE TABLE IF NOT EXISTS clip_requests (
+    video_id TEXT PRIMARY KEY,
+    count INTEGER NOT NULL,
+    first_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_clip_requests_first_at ON clip_requests (first_at);
+"""
+
+# Partial downloads older than this are left over from a crashed fill
+_STALE_PART_SECONDS = 3600
+
+# Tracks inserted this recently are never evicted, so a fill that just
+# finished is not removed before its first clip is cut from it
+_EVICT_GRACE_SECONDS = 60
+
+
+def source_key(video_id, audio_format):
+    """Content address of a source track: hash of video id and format."""
+    return hashlib.sha1(f"{video_id}:{audio_format}".encode()).hexdigest()
+
+
+class SourceAudioCache:
+    """Byte-budgeted LRU of downloaded audio tracks.
+
+    Files live under ``directory`` sharded by key prefix; a SQLite index
+    next to them records size and last access so the LRU order survives
+    restarts and is shared by all workers on the host.
+    """
+
+    def __init__(self, directory, max_bytes, max_duration=3600,
+                 audio_format=DEFAULT_SOURCE_FORMAT, fill_workers=2, fill_queue=8,
+                 fill_after=2, fill_window=600, ytdlp_cachedir=None):
+        """Initialize source audio cache."""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+        self.audio_format = audio_format
+        self.fill_workers = fill_workers
+        self.fill_queue = fill_queue
+        self.fill_after = fill_after
+        self.fill_window = fill_window
+        self.ytdlp_cachedir = ytdlp_cachedir
+        self._local = threading.local()
+        self._filling = set()
+        self._filling_lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+        self._reconcile()
+
+    def _connect(self):
+        """Get this thread's connection (one per thread and process)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(os.path.join(self.directory, 'index.db'), timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def _reconcile(self):
+        """Drop index rows whose files are gone and stale partial downloads."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key, path FROM sources").fetchall()
+            missing = [(key,) for key, path in rows if not os.path.exists(path)]
+            if missing:
+                conn.executemany("DELETE FROM sources WHERE key = ?", missing)
+                logger.info(f"Source cache dropped {len(missing)} missing entries")
+        cutoff = time.time() - _STALE_PART_SECONDS
+        for part in glob.glob(os.path.join(self.directory, '*', '*.part*')):
+            try:
+                if os.path.getmtime(part) < cutoff:
+                    os.remove(part)
+            except OSError:
+                pass
+
+    def _shard_dir(self, key):
+        return os.path.join(self.directory, key[:2])
+
+    def get(self, video_id):
+        """Return the local path of a cached source track, or None."""
+        key = source_key(video_id, self.audio_format)
+        conn = self._connect()
+        row = conn.execute("SELECT path FROM sources WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        path = row[0]
+        if not os.path.exists(path):
+            with conn:
+                conn.execute("DELETE FROM sources WHERE key = ?", (key,))
+            return None
+        with conn:
+            conn.execute(
+                "UPDATE sources SET last_access = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key)
+            )
+        return path
+
+    def should_cache(self, duration):
+        """Whether a video is short enough to be worth caching in full."""
+        return duration is not None and 0 < duration <= self.max_duration
+
+    def note_clip(self, video_id):
+        """Count a remote cut of a video; True once a fill looks worthwhile.
+
+        A full download only pays off when more clips of the same video
+        follow, so this returns True once ``fill_after`` cuts were made
+        within ``fill_window`` seconds on this host.
+        """
+        now = time.time()
+        cutoff = now - self.fill_window
+        with self._connect() as conn:
+            conn.execute("DELETE FROM clip_requests WHERE first_at < ?", (cutoff,))
+            conn.execute(
+                "INSERT INTO clip_requests (video_id, count, first_at) VALUES (?, 1, ?) "
+                "ON CONFLICT(video_id) DO UPDATE SET count = count + 1",
+                (video_id, now)
+            )
+            count = conn.execute(
+                "SELECT count FROM clip_requests WHERE video_id = ?", (video_id,)
+            ).fetchone()[0]
+        return count >= self.fill_after
+
+    def fill(self, video_id, video_url):
+        """Download a video's full audio track into the cache.
+
+        Only one process per host downloads a given track; others skip it.
+        Returns the cached path, or None if the fill was skipped or failed.
+        """
+        key = source_key(video_id, self.audio_format)
+        shard = self._shard_dir(key)
+        os.makedirs(shard, exist_ok=True)
+
+        lock_file = self._lock(os.path.join(shard, f"{key}.lock"))
+        if lock_file is None:
+            return None
+        with lock_file:
+            try:
+                existing = self.get(video_id)
+                if existing:
+                    return existing
+                path = self._download(key, shard, video_url)
+                if path is None:
+                    return None
+                try_generate_peaks(path, timeout=600)
+                size = os.path.getsize(path)
+                now = time.time()
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO sources "
+                        "(key, video_id, format, path, size, created_at, last_access, hits) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                        (key, video_id, self.audio_format, path, size, now, now)
+                    )
+                logger.info(f"Cached source audio for {video_id} ({size} bytes)")
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        self.evict()
+        return path
+
+    @staticmethod
+    def _lock(lock_path):
+        """Take a lock file's flock without waiting; None if it is held.
+
+        Eviction may unlink the file while it is unlocked, so the path is
+        checked to still be the locked inode, otherwise another process
+        could lock a fresh file at the same path at the same time.
+        """
+        while True:
+            lock_file = open(lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                return None
+            try:
+                if os.stat(lock_path).st_ino == os.fstat(lock_file.fileno()).st_ino:
+                    return lock_file
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+
+    def _download(self, key, shard, video_url):
+        """Download to a temporary name and rename it into place atomically."""
+        temp_base = os.path.join(shard, f"{key}.part{os.getpid()}")
+        ydl_opts = {
+            'format': self.audio_format,
+            'outtmpl': f"{temp_base}.%(ext)s",
+            'quiet': True,
+            'no_warnings': True,
+            'noprogress': True,
+            # Fills can start before anything resolved the video's length
+            'match_filter': yt_dlp.utils.match_filter_func(f"duration <= {self.max_duration}")
+        }
+        if self.ytdlp_cachedir:
+            ydl_opts['cachedir'] = self.ytdlp_cachedir
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(video_url, download=True)
+            downloaded = ydl.prepare_filename(info) if info else None
+        if not downloaded or not os.path.exists(downloaded):
+            logger.warning(f"Source download for {video_url} produced no file (too long?)")
+            return None
+        ext = info.get('ext') or os.path.splitext(downloaded)[1].lstrip('.')
+        path = os.path.join(shard, f"{key}.{ext}")
+        os.replace(downloaded, path)
+        return path
+
+    def is_filling(self, video_id):
+        """Whether this process has a fill queued or running for a video."""
+        with self._filling_lock:
+            return video_id in self._filling
+
+    def fill_async(self, video_id, video_url):
+        """Queue a background fill unless one is already running here.
+
+        At most ``fill_queue`` fills are queued or running per process;
+        returns False when the fill was refused because the queue is full.
+        """
+        with self._filling_lock:
+            if video_id in self._filling:
+                return True
+            if len(self._filling) >= self.fill_queue:
+                logger.warning(f"Source fill queue full, not caching {video_id}")
+                return False
+            self._filling.add(video_id)
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.fill_workers,
+                    thread_name_prefix='source-fill'
+                )
+                self._executor_pid = os.getpid()
+
+        def run():
+            try:
+                self.fill(video_id, video_url)
+            except Exception as e:
+                logger.error(f"Source audio fill failed for {video_id}: {str(e)}")
+            finally:
+                with self._filling_lock:
+                    self._filling.discard(video_id)
+
+        self._executor.submit(run)
+        return True
+
+    def evict(self):
+        """Remove least recently used tracks until the cache fits its budget."""
+        conn = self._connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM sources").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        cutoff = time.time() - _EVICT_GRACE_SECONDS
+        rows = conn.execute(
+            "SELECT key, path, size FROM sources WHERE created_at < ? ORDER BY last_access",
+            (cutoff,)
+        ).fetchall()
+        for key, path, size in rows:
+            if total <= self.max_bytes:
+                break
+            # Hold the track's lock while removing it, so a concurrent fill
+            # never has its file unlinked under it; tracks being filled are
+            # skipped
+            lock_path = os.path.join(self._shard_dir(key), f"{key}.lock")
+            try:
+                lock_file = self._lock(lock_path)
+            except OSError as e:
+                logger.error(f"Could not lock {lock_path} for eviction: {str(e)}")
+                continue
+            if lock_file is None:
+                continue
+            with lock_file:
+                # Refilled between the scan and taking the lock
+                row = conn.execute(
+                    "SELECT created_at FROM sources WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or row[0] >= cutoff:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.error(f"Could not evict {path}: {str(e)}")
+                    continue
+                with conn:
+                    conn.execute("DELETE FROM sources WHERE key = ?", (key,))
+                try:
+                    os.remove(peaks_path(path))
+                except OSError:
+                    pass
+                os.remove(lock_path)
+            total -= size
+            removed += 1
+        if removed:
+            logger.info(f"Source cache evicted {removed} tracks")
+        return removed
+
+    def stats(self):
+        """Entry count, bytes used and budget."""
+        row = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM sources"
+        ).fetchone()
+        return {
+            'entries': row[0],
+            'bytes': row[1],
+            'hits': row[2],
+            'max_bytes': self.max_bytes
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_source_cache():
+    """Get the configured source audio cache, or None if it is disabled."""
+    if not has_app_context():
+        return None
+    config = current_app.config
+    directory = config.get('SOURCE_CACHE_DIR')
+    if not directory or not config.get('SOURCE_CACHE_MAX_BYTES'):
+        return None
+    cache = _caches.get(directory)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(directory)
+            if cache is None:
+                try:
+                    cache = SourceAudioCache(
+                        directory,
+                        config['SOURCE_CACHE_MAX_BYTES'],
+                        max_duration=config.get('SOURCE_CACHE_MAX_DURATION', 3600),
+                        fill_workers=config.get('SOURCE_CACHE_FILL_WORKERS', 2),
+                        fill_queue=config.get('SOURCE_CACHE_FILL_QUEUE', 8),
+                        fill_after=config.get('SOURCE_CACHE_FILL_AFTER', 2),
+                        fill_window=config.get('SOURCE_CACHE_FILL_WINDOW', 600),
+                        ytdlp_cachedir=config.get('YTDLP_CACHE_DIR')
+                    )
+                except (OSError, sqlite3.Error) as e:
+                    logger.error(f"Source audio cache unavailable: {str(e)}")
+                    return None
+                _caches[directory] = cache
+    return cache
@@ -0,0 +1,126 @@
+"""Shared cache of resolved YouTube audio stream URLs and format metadata."""
+import json
+import time
+import logging
+import threading
+from flask import current_app, has_app_context
+from app.extensions import get_redis_client
+from app.utils.audio_segment import resolve_audio_stream, video_id_from_url
+
+logger = logging.getLogger(__name__)
+
+
+class StreamInfoCache:
+    """Redis cache of ``resolve_audio_stream`` results keyed by video ID.
+
+    Entries hold the chosen audio format's signed URL, request headers,
+    codec, bitrate and duration. Each entry expires a safety margin before
+    the URL's own ``expire`` time, so repeat clips from a video skip yt-dlp
+    extraction entirely while the URL is still usable.
+    """
+
+    KEY_PREFIX = 'yt_stream:v1:'
+
+    def __init__(self):
+        """Initialize stream info cache."""
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'errors': 0}
+
+    def _config(self, key, default):
+        if has_app_context():
+            return current_app.config.get(key, default)
+        return default
+
+    @property
+    def max_ttl(self):
+        return self._config('YTDLP_STREAM_CACHE_TTL', 4 * 3600)
+
+    @property
+    def margin(self):
+        # A clip must be able to finish reading the URL before it expires
+        return self._config('CLIP_JOB_TIMEOUT', 120) + 60
+
+    @property
+    def cachedir(self):
+        return self._config('YTDLP_CACHE_DIR', None)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _key(self, video_url):
+        return self.KEY_PREFIX + (video_id_from_url(video_url) or video_url)
+
+    def get(self, video_url):
+        """Return a cached stream that is still valid, or None."""
+        client = get_redis_client()
+        if client is None:
+            return None
+        try:
+            raw = client.get(self._key(video_url))
+        except Exception as e:
+            logger.error(f"Stream info cache read failed: {str(e)}")
+            self._count('errors')
+            return None
+        if raw is None:
+            return None
+        stream = json.loads(raw)
+        expires = stream.get('expires')
+        if expires and expires - time.time() < self.margin:
+            return None
+        return stream
+
+    def set(self, video_url, stream):
+        """Cache a resolved stream until shortly before its URL expires."""
+        ttl = self.max_ttl
+        if stream.get('expires'):
+            ttl = min(ttl, int(stream['expires'] - time.time() - self.margin))
+        if ttl <= 0:
+            return
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.set(
+                self._key(video_url),
+                json.dumps(stream, separators=(',', ':')),
+                ex=ttl
+            )
+        except Exception as e:
+            logger.error(f"Stream info cache write failed: {str(e)}")
+            self._count('errors')
+
+    def invalidate(self, video_url):
+        """Drop a cached stream that turned out to be unusable."""
+        self._count('invalidations')
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.delete(self._key(video_url))
+        except Exception as e:
+            logger.error(f"Stream info cache delete failed: {str(e)}")
+            self._count('errors')
+
+    def resolve(self, video_url, refresh=False):
+        """Get a video's audio stream, extracting only on a miss.
+
+        Returns ``(stream, from_cache)``.
+        """
+        if not refresh:
+            stream = self.get(video_url)
+            if stream is not None:
+                self._count('hits')
+                return stream, True
+        self._count('misses')
+        stream = resolve_audio_stream(video_url, cachedir=self.cachedir)
+        self.set(video_url, stream)
+        return stream, False
+
+    def stats(self):
+        """Get hit/miss counters for this process."""
+        with self._lock:
+            return dict(self._stats)
+
+
+stream_info_cache = StreamInfoCache()
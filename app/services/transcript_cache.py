@@ -0,0 +1,191 @@
+"""Two-tier transcript cache keyed by YouTube video ID."""
+import json
+import time
+import zlib
+import logging
+import threading
+from collections import OrderedDict
+from flask import current_app, has_app_context
+from app.extensions import get_redis_client
+from app.utils.compiled_transcript import CompiledTranscript
+
+logger = logging.getLogger(__name__)
+
+# Sentinel returned by TranscriptCache.get when neither tier has the video
+MISS = object()
+
+# Redis value stored for videos known to have no transcript
+_NEGATIVE = b'\x00'
+# Approximate local-tier size charged for a negative entry
+_NEGATIVE_SIZE = 64
+
+
+class TranscriptCache:
+    """In-process LRU bounded by bytes, backed by a shared Redis tier.
+
+    Redis values are zlib-compressed JSON with a TTL. Videos without a
+    transcript are cached negatively with a shorter TTL so we stop asking
+    YouTube for them on every search. The local tier holds the compiled
+    form of each transcript alongside the raw segments.
+    """
+
+    KEY_PREFIX = 'transcript:v1:'
+
+    def __init__(self):
+        """Initialize transcript cache."""
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'local_hits': 0,
+            'shared_hits': 0,
+            'negative_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'errors': 0
+        }
+
+    def _config(self, key, default):
+        if has_app_context():
+            return current_app.config.get(key, default)
+        return default
+
+    @property
+    def max_bytes(self):
+        return self._config('TRANSCRIPT_CACHE_LOCAL_BYTES', 64 * 1024 * 1024)
+
+    @property
+    def ttl(self):
+        return self._config('TRANSCRIPT_CACHE_TTL', 7 * 86400)
+
+    @property
+    def negative_ttl(self):
+        return self._config('TRANSCRIPT_CACHE_NEGATIVE_TTL', 6 * 3600)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _local_get(self, video_id):
+        with self._lock:
+            entry = self._entries.get(video_id)
+            if entry is None:
+                return MISS
+            if entry[2] <= time.monotonic():
+                del self._entries[video_id]
+                self._bytes -= entry[1]
+                return MISS
+            self._entries.move_to_end(video_id)
+            return entry[0]
+
+    def _local_set(self, video_id, value, size, ttl):
+        expires = time.monotonic() + ttl
+        with self._lock:
+            old = self._entries.pop(video_id, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[video_id] = (value, size, expires)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def _local_put(self, video_id, transcript, data_size):
+        compiled = CompiledTranscript(transcript)
+        self._local_set(video_id, compiled, data_size + compiled.nbytes, self.ttl)
+        return compiled
+
+    def get(self, video_id):
+        """Get a cached transcript.
+
+        Returns the transcript list, None if the video is known to have no
+        transcript, or MISS if neither tier has an entry.
+        """
+        compiled = self.get_compiled(video_id)
+        if compiled is None or compiled is MISS:
+            return compiled
+        return compiled.segments
+
+    def get_compiled(self, video_id):
+        """Like ``get`` but returns the CompiledTranscript."""
+        value = self._local_get(video_id)
+        if value is not MISS:
+            self._count('local_hits' if value is not None else 'negative_hits')
+            return value
+
+        client = get_redis_client()
+        if client is not None:
+            try:
+                raw = client.get(self.KEY_PREFIX + video_id)
+            except Exception as e:
+                logger.error(f"Transcript cache read failed: {str(e)}")
+                self._count('errors')
+                raw = None
+            if raw == _NEGATIVE:
+                self._local_set(video_id, None, _NEGATIVE_SIZE, self.negative_ttl)
+                self._count('negative_hits')
+                return None
+            if raw is not None:
+                try:
+                    data = zlib.decompress(raw)
+                    transcript = json.loads(data)
+                except (zlib.error, ValueError) as e:
+                    logger.error(f"Corrupt transcript cache entry for {video_id}: {e}")
+                    self._count('errors')
+                else:
+                    compiled = self._local_put(video_id, transcript, len(data))
+                    self._count('shared_hits')
+                    return compiled
+
+        self._count('misses')
+        return MISS
+
+    def set(self, video_id, transcript):
+        """Store a transcript in both tiers and return its compiled form."""
+        data = json.dumps(transcript, separators=(',', ':')).encode()
+        compiled = self._local_put(video_id, transcript, len(data))
+
+        client = get_redis_client()
+        if client is None:
+            return compiled
+        try:
+            client.set(
+                self.KEY_PREFIX + video_id,
+                zlib.compress(data, 6),
+                ex=self.ttl
+            )
+        except Exception as e:
+            logger.error(f"Transcript cache write failed: {str(e)}")
+            self._count('errors')
+        return compiled
+
+    def set_missing(self, video_id):
+        """Record that a video has no transcript."""
+        self._local_set(video_id, None, _NEGATIVE_SIZE, self.negative_ttl)
+
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.set(
+                self.KEY_PREFIX + video_id,
+                _NEGATIVE,
+                ex=self.negative_ttl
+            )
+        except Exception as e:
+            logger.error(f"Transcript cache write failed: {str(e)}")
+            self._count('errors')
+
+    def stats(self):
+        """Get hit/miss/eviction counters for this process."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['local_entries'] = len(self._entries)
+            stats['local_bytes'] = self._bytes
+        return stats
+
+
+transcript_cache = TranscriptCache()
@@ -0,0 +1,283 @@
+"""Local full-text index of every transcript we have fetched."""
+import os
+import time
+import logging
+import sqlite3
+import threading
+from flask import current_app, has_app_context
+from app.utils.compiled_transcript import CompiledTranscript
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    thumbnail TEXT NOT NULL DEFAULT '',
+    indexed_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS video_people (
+    person TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    rank INTEGER NOT NULL DEFAULT 0,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (person, video_id)
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    video_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    start REAL NOT NULL,
+    duration REAL NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_segments_video ON segments (video_id, seq);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, content='segments', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, text)
+    VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def _person_key(person_name):
+    return ' '.join((person_name or '').split()).casefold()
+
+
+def _fts_terms(phrase):
+    """Build one FTS5 query per word of a phrase; the last may be a prefix.
+
+    Words are matched separately because segments are indexed one row
+    each, so a phrase spanning a segment boundary is in no single row.
+    """
+    words = [word for word in phrase.split() if any(c.isalnum() for c in word)]
+    terms = ['"' + word.replace('"', '""') + '"' for word in words]
+    if terms:
+        terms[-1] += '*'
+    return terms
+
+
+class TranscriptIndex:
+    """SQLite FTS5 corpus of transcript segments and video metadata."""
+
+    def __init__(self, path):
+        """Initialize transcript index."""
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        """Get this thread's connection (one per thread and process)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def add_videos(self, person_name, items):
+        """Record video metadata and associate the videos with a person."""
+        person = _person_key(person_name)
+        now = time.time()
+        with self._connect() as conn:
+            for rank, item in enumerate(items):
+                snippet = item['snippet']
+                video_id = item['id']['videoId']
+                conn.execute(
+                    "INSERT INTO videos (video_id, title, description, thumbnail, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (video_id) DO UPDATE SET title = excluded.title, "
+                    "description = excluded.description, thumbnail = excluded.thumbnail, "
+                    "updated_at = excluded.updated_at",
+                    (
+                        video_id,
+                        snippet['title'],
+                        snippet['description'],
+                        snippet['thumbnails']['default']['url'],
+                        now
+                    )
+                )
+                conn.execute(
+                    "INSERT INTO video_people (person, video_id, rank, seen_at) "
+                    "VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (person, video_id) DO UPDATE SET "
+                    "rank = excluded.rank, seen_at = excluded.seen_at",
+                    (person, video_id, rank, now)
+                )
+
+    def add_transcript(self, video_id, transcript):
+        """Index (or re-index) a video's transcript segments."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM segments WHERE video_id = ?", (video_id,))
+            conn.executemany(
+                "INSERT INTO segments (video_id, seq, start, duration, text) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (video_id, seq, entry['start'], entry['duration'], entry['text'])
+                    for seq, entry in enumerate(transcript)
+                ]
+            )
+            conn.execute(
+                "INSERT INTO videos (video_id, indexed_at, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (video_id) DO UPDATE SET indexed_at = excluded.indexed_at",
+                (video_id, now, now)
+            )
+
+    def search(self, person_name, phrase, limit=10, seen_since=0):
+        """Find indexed videos for a person whose transcript contains a phrase.
+
+        Only videos a YouTube search listed for the person since
+        ``seen_since`` are candidates. Full-text search keeps those that
+        contain every word of the phrase, in any segment; matches are then
+        built with the same compiled-transcript matcher as /search, so
+        phrases spanning segments are found and results have the same
+        shape and timing fields. Videos are ordered by the most recent
+        YouTube ranking for that person.
+        """
+        terms = _fts_terms(phrase)
+        if not terms:
+            return []
+        person = _person_key(person_name)
+        conn = self._connect()
+        containing = ' INTERSECT '.join(
+            ["SELECT s.video_id FROM segments_fts f JOIN segments s ON s.id = f.rowid "
+             "WHERE segments_fts MATCH ?"] * len(terms)
+        )
+        candidates = conn.execute(
+            "SELECT v.video_id, v.title, v.description, v.thumbnail "
+            "FROM video_people p "
+            "JOIN videos v ON v.video_id = p.video_id "
+            "WHERE p.person = ? AND p.seen_at >= ? "
+            f"AND p.video_id IN ({containing}) "
+            "ORDER BY p.seen_at DESC, p.rank",
+            (person, seen_since, *terms)
+        ).fetchall()
+
+        videos = []
+        for video_id, title, description, thumbnail in candidates:
+            segments = [
+                {'text': text, 'start': start, 'duration': duration}
+                for text, start, duration in conn.execute(
+                    "SELECT text, start, duration FROM segments "
+                    "WHERE video_id = ? ORDER BY seq",
+                    (video_id,)
+                )
+            ]
+            matches = CompiledTranscript(segments).find(phrase)
+            if not matches:
+                continue
+            videos.append({
+                'id': video_id,
+                'title': title,
+                'description': description,
+                'thumbnail': thumbnail,
+                'matches': matches
+            })
+            if len(videos) >= limit:
+                break
+        return videos
+
+    def compact(self, max_age_days=None):
+        """Prune stale videos, merge FTS segments and reclaim disk space."""
+        conn = self._connect()
+        removed = 0
+        with conn:
+            if max_age_days:
+                cutoff = time.time() - max_age_days * 86400
+                stale = [
+                    row[0] for row in conn.execute(
+                        "SELECT video_id FROM videos WHERE updated_at < ? "
+                        "AND video_id NOT IN ("
+                        "SELECT video_id FROM video_people WHERE seen_at >= ?)",
+                        (cutoff, cutoff)
+                    )
+                ]
+                for video_id in stale:
+                    conn.execute("DELETE FROM segments WHERE video_id = ?", (video_id,))
+                    conn.execute("DELETE FROM video_people WHERE video_id = ?", (video_id,))
+                    conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+                removed = len(stale)
+            conn.execute("INSERT INTO segments_fts (segments_fts) VALUES ('optimize')")
+        conn.execute('VACUUM')
+        conn.execute('PRAGMA optimize')
+        logger.info(f"Transcript index compacted ({removed} stale videos removed)")
+        return removed
+
+    def stats(self):
+        """Get index size counters."""
+        conn = self._connect()
+        return {
+            'videos': conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0],
+            'indexed_videos': conn.execute(
+                "SELECT COUNT(*) FROM videos WHERE indexed_at IS NOT NULL"
+            ).fetchone()[0],
+            'segments': conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0],
+            'file_bytes': os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        }
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_transcript_index():
+    """Get the configured transcript index, or None if it is disabled."""
+    if not has_app_context():
+        return None
+    path = current_app.config.get('TRANSCRIPT_INDEX_PATH')
+    if not path:
+        return None
+    index = _indexes.get(path)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(path)
+            if index is None:
+                try:
+                    index = TranscriptIndex(path)
+                except sqlite3.Error as e:
+                    logger.error(f"Transcript index unavailable: {str(e)}")
+                    return None
+                _indexes[path] = index
+    return index
+
+
+def lookup_local(person_name, phrase):
+    """Search the local index first; returns None when YouTube is needed.
+
+    The index only answers from videos YouTube listed for the person within
+    ``TRANSCRIPT_INDEX_MAX_AGE`` seconds, so new uploads still show up.
+    """
+    index = get_transcript_index()
+    if index is None:
+        return None
+    config = current_app.config
+    seen_since = time.time() - config.get('TRANSCRIPT_INDEX_MAX_AGE', 6 * 3600)
+    # Fewer local hits than a YouTube results page would find go to YouTube
+    min_results = config.get('TRANSCRIPT_INDEX_MIN_RESULTS', 10)
+    try:
+        videos = index.search(
+            person_name, phrase, limit=max(min_results, 10), seen_since=seen_since
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Transcript index search failed: {str(e)}")
+        return None
+    if len(videos) < min_results:
+        return None
+    logger.info(f"Served {len(videos)} videos from the local transcript index")
+    return videos
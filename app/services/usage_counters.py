@@ -0,0 +1,193 @@
+"""Atomic search usage counters in Redis with a per-process fallback."""
+import time
+import logging
+import threading
+from app.extensions import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Check the limit and charge in one step. Returns {allowed, used, ttl_ms}.
+# A zero amount only reads; a negative amount refunds (never below zero).
+# The window starts with the first charge and is not extended by later ones.
+_CHARGE_SCRIPT = """
+local amount = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+if amount == 0 then
+    return {1, used, redis.call('PTTL', KEYS[1])}
+end
+if amount > 0 and used + amount > limit then
+    return {0, used, redis.call('PTTL', KEYS[1])}
+end
+if amount < 0 and used + amount < 0 then
+    amount = -used
+end
+used = redis.call('INCRBY', KEYS[1], amount)
+local ttl = redis.call('PTTL', KEYS[1])
+if ttl < 0 then
+    ttl = tonumber(ARGV[3])
+    redis.call('PEXPIRE', KEYS[1], ttl)
+end
+return {1, used, ttl}
+"""
+
+# Expired fallback counters are pruned once this many keys are held
+_LOCAL_MAX_KEYS = 10000
+
+
+class UsageCounters:
+    """Fixed-window usage counters checked and charged in one round trip.
+
+    Counters are plain Redis integers (``free_searches:<ip>``,
+    ``token_usage:<token>``) that expire at the end of their window. When
+    Redis is unavailable, counting continues per process so limits still
+    roughly hold instead of being lifted. An attached ``breaker`` decides
+    when Redis is skipped, so an outage does not cost a timeout per call.
+    """
+
+    def __init__(self, breaker=None):
+        """Initialize usage counters."""
+        self.breaker = breaker
+        self._scripts = {}
+        self._local = {}
+        self._lock = threading.Lock()
+
+    def _script(self, client):
+        script = self._scripts.get(id(client))
+        if script is None:
+            script = client.register_script(_CHARGE_SCRIPT)
+            self._scripts[id(client)] = script
+        return script
+
+    @staticmethod
+    def _expires(ttl_ms):
+        """Unix time (whole seconds) a counter with this PTTL ends, or None."""
+        return int(round(time.time() + ttl_ms / 1000)) if ttl_ms >= 0 else None
+
+    def _local_charge(self, key, amount, limit, window):
+        now = time.time()
+        with self._lock:
+            if len(self._local) > _LOCAL_MAX_KEYS:
+                self._local = {
+                    k: v for k, v in self._local.items() if v[1] is None or v[1] > now
+                }
+            used, expires_at = self._local.get(key, (0, None))
+            if expires_at is not None and expires_at <= now:
+                used, expires_at = 0, None
+            if amount > 0 and used + amount > limit:
+                return False, used, expires_at
+            if amount:
+                used = max(used + amount, 0)
+                if expires_at is None:
+                    expires_at = now + window
+                self._local[key] = (used, expires_at)
+            return True, used, expires_at
+
+    def charge(self, key, amount, limit, window):
+        """Charge ``amount`` against ``limit`` if it fits.
+
+        ``window`` is the counter's lifetime in seconds, starting with the
+        first charge. Returns ``{'allowed', 'used', 'remaining', 'expires'}``
+        where ``expires`` is a Unix time (None while nothing is counted).
+        """
+        window = max(int(window), 1)
+        breaker = self.breaker
+        client = get_redis_client() if breaker is None or breaker.allow() else None
+        result = None
+        if client is not None:
+            try:
+                allowed, used, ttl = self._script(client)(
+                    keys=[key], args=[int(amount), int(limit), window * 1000]
+                )
+                result = bool(allowed), int(used), self._expires(ttl)
+                if breaker is not None:
+                    breaker.record_success()
+            except Exception as e:
+                logger.error(f"Usage counter update failed, counting locally: {str(e)}")
+                if breaker is not None:
+                    breaker.record_failure(probe=client.ping)
+        if result is None:
+            result = self._local_charge(key, amount, limit, window)
+        allowed, used, expires = result
+        return {
+            'allowed': allowed,
+            'used': used,
+            'remaining': max(int(limit) - used, 0),
+            'expires': expires
+        }
+
+    def peek(self, key, limit, window):
+        """Read a counter without charging."""
+        return self.charge(key, 0, limit, window)
+
+    def peek_many(self, counters):
+        """Read several ``(key, limit, window)`` counters in one round trip.
+
+        Uses a non-transactional pipeline of GET/PTTL pairs. Returns one
+        status dict per counter, shaped like ``charge``'s.
+        """
+        breaker = self.breaker
+        client = get_redis_client() if breaker is None or breaker.allow() else None
+        readings = None
+        if client is not None and counters:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for key, _, _ in counters:
+                    pipe.get(key)
+                    pipe.pttl(key)
+                replies = pipe.execute()
+                readings = [
+                    (int(replies[i] or 0), self._expires(replies[i + 1]))
+                    for i in range(0, len(replies), 2)
+                ]
+                if breaker is not None:
+                    breaker.record_success()
+            except Exception as e:
+                logger.error(f"Usage counter read failed, using local counts: {str(e)}")
+                if breaker is not None:
+                    breaker.record_failure(probe=client.ping)
+        if readings is None:
+            readings = [
+                self._local_charge(key, 0, limit, max(int(window), 1))[1:]
+                for key, limit, window in counters
+            ]
+        return [
+            {
+                'allowed': True,
+                'used': used,
+                'remaining': max(int(limit) - used, 0),
+                'expires': expires
+            }
+            for (used, expires), (_, limit, _) in zip(readings, counters)
+        ]
+
+    def refund(self, key, amount, limit, window):
+        """Give back ``amount`` after a charged operation failed."""
+        return self.charge(key, -amount, limit, window)
+
+    def reset(self, key):
+        """Drop a counter, e.g. when its subscription ends."""
+        with self._lock:
+            self._local.pop(key, None)
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            client.delete(key)
+        except Exception as e:
+            logger.error(f"Usage counter reset failed: {str(e)}")
+
+    def exists(self, key):
+        """Whether a counter is currently being kept for ``key``."""
+        client = get_redis_client()
+        if client is None:
+            with self._lock:
+                return key in self._local
+        try:
+            return bool(client.exists(key))
+        except Exception as e:
+            logger.error(f"Usage counter lookup failed: {str(e)}")
+            return False
+
+
+usage_counters = UsageCounters()
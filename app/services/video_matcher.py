@@ -0,0 +1,166 @@
+"""Concurrent transcript fetch and matching for YouTube search results."""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app
+from app.utils.youtube_search_and_clip import (
+    get_compiled_transcript, search_word_in_transcript
+)
+from app.utils.compiled_transcript import PhraseMatcher
+
+logger = logging.getLogger(__name__)
+
+# Executor is created lazily so each forked gunicorn worker gets its own
+# threads (threads started before the fork do not survive it).
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Get the bounded transcript executor for this process."""
+    global _executor, _executor_pid
+    if _executor is not None and _executor_pid == os.getpid():
+        return _executor
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            max_workers = current_app.config.get('SEARCH_FANOUT_WORKERS', 10)
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix='transcript'
+            )
+            _executor_pid = os.getpid()
+            logger.info(f"Transcript executor started ({max_workers} workers)")
+    return _executor
+
+
+def build_video_result(item, matches):
+    """Build the result dict returned to the client for one video."""
+    return {
+        'id': item['id']['videoId'],
+        'title': item['snippet']['title'],
+        'description': item['snippet']['description'],
+        'thumbnail': item['snippet']['thumbnails']['default']['url'],
+        'matches': matches
+    }
+
+
+def match_video(item, search_word):
+    """Fetch one video's transcript and match the search word against it."""
+    video_id = item['id']['videoId']
+    transcript = get_compiled_transcript(video_id)
+    if not transcript:
+        return None
+    matches = search_word_in_transcript(transcript, search_word)
+    if not matches:
+        return None
+    return build_video_result(item, matches)
+
+
+def iter_video_matches(items, matcher, video_timeout=None, request_timeout=None):
+    """Run ``matcher(item)`` for each item concurrently.
+
+    Yields ``(rank, result)`` pairs in completion order for every item whose
+    matcher returned a truthy result. Items that take longer than
+    ``video_timeout`` (measured from when they start running) or that are
+    still pending once ``request_timeout`` has elapsed are dropped.
+    """
+    config = current_app.config
+    if video_timeout is None:
+        video_timeout = config.get('SEARCH_VIDEO_TIMEOUT', 8.0)
+    if request_timeout is None:
+        request_timeout = config.get('SEARCH_REQUEST_TIMEOUT', 15.0)
+
+    app = current_app._get_current_object()
+    executor = get_executor()
+    started = {}
+
+    def run(rank, item):
+        started[rank] = time.monotonic()
+        with app.app_context():
+            return matcher(item)
+
+    deadline = time.monotonic() + request_timeout
+    pending = {
+        executor.submit(run, rank, item): rank
+        for rank, item in enumerate(items)
+    }
+
+    try:
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                logger.warning(
+                    f"Search deadline reached, dropping {len(pending)} videos"
+                )
+                break
+
+            # Drop videos that have been running past their own deadline
+            for future, rank in list(pending.items()):
+                start = started.get(rank)
+                if start is not None and now - start >= video_timeout:
+                    logger.warning(f"Video {rank} exceeded {video_timeout}s, dropping")
+                    future.cancel()
+                    del pending[future]
+            if not pending:
+                break
+
+            # Wake up no later than the next per-video or request deadline
+            next_wakeup = deadline
+            for rank in pending.values():
+                start = started.get(rank)
+                if start is not None:
+                    next_wakeup = min(next_wakeup, start + video_timeout)
+            done, _ = wait(
+                pending,
+                timeout=max(0.01, next_wakeup - time.monotonic()),
+                return_when=FIRST_COMPLETED
+            )
+
+            for future in done:
+                rank = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing video {rank}: {str(e)}")
+                    continue
+                if result:
+                    yield rank, result
+    finally:
+        # Queued work for dropped videos is abandoned; running fetches
+        # finish in the background and their results are discarded.
+        for future in pending:
+            future.cancel()
+
+
+def match_videos(items, search_word, **timeouts):
+    """Match a search word against all items, keeping the original ranking."""
+    results = dict(iter_video_matches(
+        items,
+        lambda item: match_video(item, search_word),
+        **timeouts
+    ))
+    return [results[rank] for rank in sorted(results)]
+
+
+def match_videos_batch(items, phrases, **timeouts):
+    """Match many phrases against all items with one scan per transcript.
+
+    Returns ``{phrase: [video, ...]}`` with videos in the original ranking.
+    """
+    matcher = PhraseMatcher(phrases)
+
+    def match_all(item):
+        transcript = get_compiled_transcript(item['id']['videoId'])
+        if not transcript:
+            return None
+        return matcher.find_all(transcript) or None
+
+    found = dict(iter_video_matches(items, match_all, **timeouts))
+    grouped = {phrase: [] for phrase in matcher.phrases}
+    for rank in sorted(found):
+        for phrase, matches in found[rank].items():
+            grouped[phrase].append(build_video_result(items[rank], matches))
+    return grouped
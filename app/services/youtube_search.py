@@ -0,0 +1,172 @@
+"""Cached YouTube search with daily quota accounting."""
+import re
+import time
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from app.extensions import cache, get_redis_client
+from app.services.transcript_index import get_transcript_index
+
+logger = logging.getLogger(__name__)
+
+try:
+    from zoneinfo import ZoneInfo
+    _QUOTA_TZ = ZoneInfo('America/Los_Angeles')
+except Exception:
+    # YouTube quota resets at midnight Pacific; ignore DST without tzdata
+    _QUOTA_TZ = timezone(timedelta(hours=-8))
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(person_name, search_word):
+    """Normalize a person/word pair into a cache key fragment."""
+    person = _WHITESPACE.sub(' ', person_name or '').strip().casefold()
+    word = _WHITESPACE.sub(' ', search_word or '').strip().casefold()
+    return f"{person}|{word}"
+
+
+def _slim_item(item):
+    """Keep only the fields the search pipeline reads from an item."""
+    snippet = item.get('snippet', {})
+    return {
+        'id': {'videoId': item['id']['videoId']},
+        'snippet': {
+            'title': snippet.get('title', ''),
+            'description': snippet.get('description', ''),
+            'thumbnails': {
+                'default': {
+                    'url': snippet.get('thumbnails', {}).get('default', {}).get('url', '')
+                }
+            }
+        }
+    }
+
+
+class QuotaLedger:
+    """Per-day YouTube Data API quota ledger stored in a Redis hash."""
+
+    KEY_PREFIX = 'yt_quota:'
+
+    def _key(self, day=None):
+        day = day or datetime.now(_QUOTA_TZ).date()
+        return f"{self.KEY_PREFIX}{day.isoformat()}"
+
+    def _record(self, field, units):
+        client = get_redis_client()
+        if client is None:
+            return
+        try:
+            key = self._key()
+            pipe = client.pipeline()
+            pipe.hincrby(key, field, units)
+            pipe.expire(key, 3 * 86400)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Quota ledger update failed: {str(e)}")
+
+    def record_spent(self, units):
+        """Record quota units spent on an API call."""
+        self._record('spent', units)
+
+    def record_saved(self, units):
+        """Record quota units saved by serving from cache."""
+        self._record('saved', units)
+
+    def usage(self, day=None):
+        """Get spent/saved units for a day (today by default)."""
+        client = get_redis_client()
+        if client is None:
+            return {'spent': 0, 'saved': 0}
+        try:
+            raw = client.hgetall(self._key(day))
+        except Exception as e:
+            logger.error(f"Quota ledger read failed: {str(e)}")
+            return {'spent': 0, 'saved': 0}
+        return {
+            'spent': int(raw.get(b'spent', 0)),
+            'saved': int(raw.get(b'saved', 0))
+        }
+
+    def near_limit(self):
+        """Check whether today's spend has reached the reserve threshold."""
+        config = current_app.config
+        budget = config.get('YOUTUBE_DAILY_QUOTA', 10000)
+        threshold = config.get('YOUTUBE_QUOTA_RESERVE', 0.9)
+        return self.usage()['spent'] >= budget * threshold
+
+
+quota_ledger = QuotaLedger()
+
+
+def search_videos(youtube, person_name, search_word):
+    """Search YouTube for a person/word pair, serving from cache when possible.
+
+    Fresh cache entries are always used. Stale entries are used when today's
+    quota spend is near the budget, or when the API call fails.
+    """
+    config = current_app.config
+    fresh_ttl = config.get('YOUTUBE_SEARCH_CACHE_TTL', 6 * 3600)
+    stale_ttl = config.get('YOUTUBE_SEARCH_STALE_TTL', 7 * 86400)
+    cost = config.get('YOUTUBE_SEARCH_COST', 100)
+
+    normalized = normalize_query(person_name, search_word)
+    cache_key = f"yt_search:v1:{hashlib.sha1(normalized.encode()).hexdigest()}"
+
+    try:
+        entry = cache.get(cache_key)
+    except Exception as e:
+        logger.error(f"Search cache read failed: {str(e)}")
+        entry = None
+
+    if entry:
+        age = time.time() - entry['fetched_at']
+        if age < fresh_ttl:
+            quota_ledger.record_saved(cost)
+            return entry['items']
+        if youtube is None or quota_ledger.near_limit():
+            logger.warning(f"Serving stale search results ({int(age)}s old)")
+            quota_ledger.record_saved(cost)
+            return entry['items']
+
+    if youtube is None:
+        raise RuntimeError("YouTube API client is not configured")
+
+    search_query = f"{person_name} {search_word}"
+    logger.info(f"Performing YouTube search for: {search_query}")
+    try:
+        search_results = youtube.search().list(
+            part="id,snippet",
+            q=search_query,
+            type="video",
+            maxResults=10
+        ).execute()
+    except Exception as e:
+        if entry:
+            logger.error(f"YouTube search failed, serving stale results: {str(e)}")
+            quota_ledger.record_saved(cost)
+            return entry['items']
+        raise
+    quota_ledger.record_spent(cost)
+
+    items = [
+        _slim_item(item) for item in search_results.get('items', [])
+        if item.get('id', {}).get('videoId')
+    ]
+    index = get_transcript_index()
+    if index is not None:
+        try:
+            index.add_videos(person_name, items)
+        except Exception as e:
+            logger.error(f"Failed to index search results: {str(e)}")
+
+    try:
+        cache.set(
+            cache_key,
+            {'items': items, 'fetched_at': time.time()},
+            timeout=stale_ttl
+        )
+    except Exception as e:
+        logger.error(f"Search cache write failed: {str(e)}")
+    return items
@@ -1,12 +1,17 @@
 """Task scheduler module."""
 import logging
+from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from flask import current_app
 from app.tasks.subscription_monitor import (
     cleanup_expired_subscriptions,
     notify_expiring_subscriptions,
     check_subscription_health
 )
+from app.services.clip_store import get_clip_store
+from app.services.search_events import drain_search_events
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +45,44 @@ def init_scheduler():
         replace_existing=True
     )
     
+    # Clip store maintenance: index the existing tree once at startup,
+    # then enforce the size, age and free-space limits
+    clip_store = get_clip_store()
+    if clip_store:
+        scheduler.add_job(
+            func=clip_store.reconcile,
+            trigger=CronTrigger(hour=3),  # Daily, plus once at startup
+            next_run_time=datetime.now(),
+            id='reconcile_clip_store',
+            name='Reconcile clip store index with disk',
+            replace_existing=True
+        )
+        
+        scheduler.add_job(
+            func=clip_store.evict,
+            trigger=CronTrigger(minute='*/10'),  # Every 10 minutes
+            id='evict_clips',
+            name='Evict old and excess clips',
+            replace_existing=True
+        )
+    
+    # Search events: write the Redis stream to search_logs in batches
+    app = current_app._get_current_object()
+
+    def store_search_events():
+        with app.app_context():
+            drain_search_events()
+
+    scheduler.add_job(
+        func=store_search_events,
+        trigger=IntervalTrigger(seconds=app.config.get('SEARCH_EVENTS_INTERVAL', 30)),
+        id='store_search_events',
+        name='Store queued search events',
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+    
     # Start scheduler
     scheduler.start()
     logger.info("Task scheduler started")
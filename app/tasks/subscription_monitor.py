@@ -5,6 +5,7 @@ from sqlalchemy import and_, or_
 from app.models import Subscription
 from app.services.email_service import send_email
 from app.extensions import db, cache
+from app.services.usage_counters import usage_counters
 
 logger = logging.getLogger(__name__)
 
@@ -48,7 +49,7 @@ def cleanup_expired_subscriptions():
         for sub in expired:
             try:
                 # Clear cache
-                cache.delete(f"token_usage:{sub.access_token}")
+                usage_counters.reset(f"token_usage:{sub.access_token}")
                 
                 # Update subscription status
                 sub.status = 'expired'
@@ -166,8 +167,7 @@ def check_subscription_health():
         active = Subscription.query.filter_by(status='active').all()
         for sub in active:
             try:
-                cache_key = f"token_usage:{sub.access_token}"
-                if not cache.get(cache_key):
+                if not usage_counters.exists(f"token_usage:{sub.access_token}"):
                     logger.warning(
                         f"Active subscription {sub.id} missing from cache"
                     )
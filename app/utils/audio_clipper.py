@@ -1,7 +1,6 @@
-import yt_dlp
-import subprocess
 import os
 from datetime import datetime
+from app.utils.audio_segment import download_segment
 
 
 def parse_timestamp(timestamp):
@@ -28,7 +27,7 @@ def format_filename(video_id, start_time, duration):
     return f"clip_{video_id}_{int(start_time)}s_to_{int(start_time + duration)}s_{timestamp}.mp3"
 
 
-def download_audio_clip(video_url, start_time, duration=1.0, output_dir="clips"):
+def download_audio_clip(video_url, start_time, duration=1.0, output_dir="clips", source_cache=None):
     """Download a specific segment of audio from a YouTube video."""
     
     # Create output directory if it doesn't exist
@@ -51,39 +50,9 @@ def download_audio_clip(video_url, start_time, duration=1.0, output_dir="clips")
         # Generate output filename
         output_file = os.path.join(output_dir, format_filename(video_id, start_seconds, duration))
         
-        # Download options
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'quiet': True,
-            'no_warnings': True,
-            'extract_audio': True,
-            'outtmpl': f'temp_{video_id}.%(ext)s'
-        }
-        
-        print("Downloading audio...")
-        # Download full audio
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(video_url, download=True)
-            temp_file = f"temp_{video_id}.mp3"
-        
         print(f"Extracting clip from {start_seconds:.2f}s to {start_seconds + duration:.2f}s...")
-        # Cut the specific segment using ffmpeg
-        subprocess.run([
-            'ffmpeg',
-            '-i', temp_file,
-            '-ss', f"{start_seconds:.3f}",  # More precise timestamp
-            '-t', f"{duration:.3f}",        # More precise duration
-            '-c', 'copy',
-            output_file
-        ], capture_output=True)
-        
-        # Clean up temporary file
-        os.remove(temp_file)
+        # Fetch and encode only the requested range from the remote stream
+        download_segment(video_url, start_seconds, duration, output_file, source_cache=source_cache)
         
         print(f"Successfully saved clip to: {output_file}")
         return output_file
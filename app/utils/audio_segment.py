@@ -0,0 +1,419 @@
+"""Fetch and encode a single time range of a video's audio."""
+import os
+import logging
+import shutil
+import threading
+import subprocess
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import yt_dlp
+from app.utils.silence import snap_boundaries
+
+logger = logging.getLogger(__name__)
+
+# Seconds decoded before the requested start. The fast input seek lands on a
+# packet boundary at or before this point, and the accurate output seek then
+# trims the pre-roll away.
+PRE_ROLL = 2.0
+CLIP_BITRATE = '192k'
+FFMPEG_TIMEOUT = 120
+
+# PCM layout used when a segment is decoded for boundary snapping
+PCM_SAMPLE_RATE = 44100
+PCM_CHANNELS = 2
+
+
+def stream_expiry(url):
+    """Unix time a signed stream URL stops working, if it says."""
+    try:
+        return int(parse_qs(urlparse(url).query)['expire'][0])
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+def resolve_audio_stream(video_url, cachedir=None):
+    """Resolve the direct URL of a video's best audio stream.
+
+    Returns ``{'url', 'http_headers', 'ext', 'acodec', 'abr', 'format_id',
+    'duration', 'expires'}`` without downloading any media. ``cachedir``
+    is yt-dlp's cache of player signature code.
+    """
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+        'socket_timeout': 15
+    }
+    if cachedir:
+        ydl_opts['cachedir'] = cachedir
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+
+    # Some extractors return the chosen format only in requested_formats
+    stream = info
+    if not stream.get('url') and info.get('requested_formats'):
+        stream = info['requested_formats'][0]
+    if not stream.get('url'):
+        raise ValueError(f"No audio stream found for {video_url}")
+
+    return {
+        'url': stream['url'],
+        'http_headers': stream.get('http_headers') or info.get('http_headers') or {},
+        'ext': stream.get('ext'),
+        'acodec': stream.get('acodec'),
+        'abr': stream.get('abr'),
+        'format_id': stream.get('format_id'),
+        'duration': info.get('duration'),
+        'expires': stream_expiry(stream['url'])
+    }
+
+
+def _with_remote_stream(video_url, stream_cache, attempt):
+    """Run ``attempt(stream)`` against the video's resolved audio stream.
+
+    With a ``stream_cache`` a cached resolution is tried first; if ffmpeg
+    fails on it (the signed URL expired or is bound to another IP) the
+    entry is dropped and the attempt repeated once on a fresh extraction.
+    Returns ``(result, stream)``.
+    """
+    if stream_cache is None:
+        stream = resolve_audio_stream(video_url)
+        return attempt(stream), stream
+
+    stream, cached = stream_cache.resolve(video_url)
+    try:
+        return attempt(stream), stream
+    except RuntimeError as e:
+        if not cached:
+            raise
+        logger.warning(f"Cached stream URL failed, extracting again: {str(e)}")
+        stream_cache.invalidate(video_url)
+        stream, _ = stream_cache.resolve(video_url, refresh=True)
+        return attempt(stream), stream
+
+
+def _seek_args(start_time, pre_roll):
+    """Split a start time into a fast input seek and an exact output seek."""
+    input_seek = max(start_time - pre_roll, 0.0)
+    return input_seek, start_time - input_seek
+
+
+def build_segment_command(source, start_time, duration, output_path,
+                          http_headers=None, pre_roll=PRE_ROLL,
+                          bitrate=CLIP_BITRATE, output_format='mp3', threads=None):
+    """Build the ffmpeg command that encodes one segment of ``source``.
+
+    ``source`` may be a local file or a remote stream URL. For remote
+    streams ffmpeg seeks with HTTP range requests, so only the bytes around
+    the segment are fetched. ``output_format='s16le'`` decodes to raw PCM
+    (``PCM_SAMPLE_RATE``, ``PCM_CHANNELS``) instead of encoding an MP3.
+    """
+    input_seek, output_seek = _seek_args(float(start_time), pre_roll)
+    command = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin', '-y']
+    if threads:
+        command += ['-threads', str(threads)]
+    if source.startswith(('http://', 'https://')):
+        command += ['-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5']
+        if http_headers:
+            command += ['-headers', ''.join(
+                f"{name}: {value}\r\n" for name, value in http_headers.items()
+            )]
+    command += [
+        '-ss', f"{input_seek:.3f}",
+        '-i', source,
+        '-ss', f"{output_seek:.3f}",
+        '-t', f"{float(duration):.3f}",
+        '-vn'
+    ]
+    if output_format == 's16le':
+        command += [
+            '-acodec', 'pcm_s16le', '-ac', str(PCM_CHANNELS), '-ar', str(PCM_SAMPLE_RATE)
+        ]
+    else:
+        command += ['-acodec', 'libmp3lame', '-b:a', bitrate]
+    command += ['-f', output_format, output_path]
+    return command
+
+
+def resource_prefix(niceness=None, cpu_seconds=None):
+    """Command prefix that lowers priority and caps CPU time.
+
+    ``nice`` and ``prlimit`` apply the limits in the child after exec;
+    a ``preexec_fn`` is unsafe here because clips render on threads.
+    A tool missing on this host is skipped.
+    """
+    prefix = []
+    if niceness and shutil.which('nice'):
+        prefix += ['nice', '-n', str(int(niceness))]
+    if cpu_seconds and shutil.which('prlimit'):
+        cpu_seconds = int(cpu_seconds)
+        prefix += ['prlimit', f'--cpu={cpu_seconds}:{cpu_seconds + 5}', '--']
+    return prefix
+
+
+def _snapped_pcm(source, start_time, duration, http_headers, pre_roll, timeout,
+                 threads, prefix, tolerance):
+    """Fetch a segment once as PCM and cut it at quiet points near its ends.
+
+    The segment is decoded with ``tolerance`` seconds of slack either side;
+    the returned bytes are the snapped slice of that single fetch.
+    """
+    window_start = max(float(start_time) - tolerance, 0.0)
+    lead = float(start_time) - window_start
+    command = build_segment_command(
+        source, window_start, lead + float(duration) + tolerance, 'pipe:1',
+        http_headers=http_headers, pre_roll=pre_roll, output_format='s16le',
+        threads=threads
+    )
+    result = subprocess.run(prefix + command, capture_output=True, timeout=timeout)
+    if result.returncode != 0 or not result.stdout:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()}")
+
+    frames = len(result.stdout) // (2 * PCM_CHANNELS)
+    pcm = np.frombuffer(result.stdout, dtype='<i2', count=frames * PCM_CHANNELS)
+    pcm = pcm.reshape(frames, PCM_CHANNELS)
+    start = int(round(lead * PCM_SAMPLE_RATE))
+    end = min(start + int(round(float(duration) * PCM_SAMPLE_RATE)), frames)
+    snapped_start, snapped_end = snap_boundaries(
+        pcm.mean(axis=1), PCM_SAMPLE_RATE, start, end, tolerance
+    )
+    logger.info(
+        f"Snapped clip boundaries by {(snapped_start - start) / PCM_SAMPLE_RATE:+.2f}s "
+        f"and {(snapped_end - end) / PCM_SAMPLE_RATE:+.2f}s"
+    )
+    return pcm[snapped_start:snapped_end].tobytes()
+
+
+def render_segment(source, start_time, duration, output_path, http_headers=None,
+                   pre_roll=PRE_ROLL, timeout=FFMPEG_TIMEOUT, threads=None,
+                   niceness=None, cpu_seconds=None, snap_tolerance=0):
+    """Encode one segment of ``source`` to an MP3 at ``output_path``.
+
+    The file is written under a temporary name and renamed into place, so
+    a partially written clip is never visible. ``timeout`` bounds wall
+    time; ``threads``, ``niceness`` and ``cpu_seconds`` bound the CPU one
+    ffmpeg process may use. With ``snap_tolerance`` (seconds) each cut
+    point moves to the nearest quiet frame within that distance.
+    """
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{output_path}.{os.getpid()}-{threading.get_ident()}.part"
+    prefix = resource_prefix(niceness, cpu_seconds)
+    pcm = None
+    if snap_tolerance:
+        pcm = _snapped_pcm(
+            source, start_time, duration, http_headers, pre_roll, timeout,
+            threads, prefix, snap_tolerance
+        )
+        command = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-y']
+        if threads:
+            command += ['-threads', str(threads)]
+        command += [
+            '-f', 's16le', '-ar', str(PCM_SAMPLE_RATE), '-ac', str(PCM_CHANNELS),
+            '-i', 'pipe:0',
+            '-acodec', 'libmp3lame', '-b:a', CLIP_BITRATE, '-f', 'mp3', temp_path
+        ]
+    else:
+        command = build_segment_command(
+            source, start_time, duration, temp_path,
+            http_headers=http_headers, pre_roll=pre_roll, threads=threads
+        )
+    try:
+        result = subprocess.run(
+            prefix + command, input=pcm, capture_output=True, timeout=timeout
+        )
+        if result.returncode != 0 or not os.path.exists(temp_path):
+            raise RuntimeError(
+                f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()}"
+            )
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return output_path
+
+
+def stream_process(command, timeout=FFMPEG_TIMEOUT, tee_path=None,
+                   on_complete=None, chunk_size=64 * 1024):
+    """Run an ffmpeg command writing to stdout and yield its output.
+
+    With ``tee_path`` the bytes are also written to a temporary file that
+    is renamed to ``tee_path`` (and ``on_complete(tee_path)`` called) only
+    if ffmpeg finishes cleanly. Closing the generator early kills ffmpeg
+    and discards the partial copy.
+    """
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    watchdog = threading.Timer(timeout, process.kill)
+    watchdog.daemon = True
+    watchdog.start()
+
+    tee = None
+    temp_path = None
+    completed = False
+    try:
+        if tee_path:
+            os.makedirs(os.path.dirname(tee_path) or '.', exist_ok=True)
+            temp_path = f"{tee_path}.{os.getpid()}-{threading.get_ident()}.part"
+            tee = open(temp_path, 'wb')
+        while True:
+            chunk = process.stdout.read1(chunk_size)
+            if not chunk:
+                break
+            if tee:
+                tee.write(chunk)
+            yield chunk
+        returncode = process.wait()
+        if returncode != 0:
+            raise RuntimeError(
+                f"ffmpeg failed ({returncode}): "
+                f"{process.stderr.read().decode(errors='replace').strip()}"
+            )
+        if tee:
+            tee.close()
+            os.replace(temp_path, tee_path)
+            if on_complete:
+                on_complete(tee_path)
+        completed = True
+    finally:
+        watchdog.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        process.stderr.close()
+        if tee:
+            tee.close()
+            if not completed and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def stream_segment(source, start_time, duration, http_headers=None, pre_roll=PRE_ROLL,
+                   timeout=FFMPEG_TIMEOUT, threads=None, niceness=None, cpu_seconds=None,
+                   **stream_options):
+    """Encode one segment of ``source`` and yield the MP3 bytes as produced.
+
+    ffmpeg writes to stdout, so nothing touches the disk unless a
+    ``tee_path`` is passed through to ``stream_process``.
+    """
+    command = build_segment_command(
+        source, start_time, duration, 'pipe:1',
+        http_headers=http_headers, pre_roll=pre_roll, threads=threads
+    )
+    command = resource_prefix(niceness, cpu_seconds) + command
+    return stream_process(command, timeout=timeout, **stream_options)
+
+
+def build_concat_command(paths, output_path='pipe:1', bitrate=CLIP_BITRATE, threads=None):
+    """Build the ffmpeg command that joins audio files into one MP3.
+
+    Uses the concat filter, which resamples inputs with differing sample
+    rates or channel layouts to a common format.
+    """
+    command = ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostdin', '-y']
+    if threads:
+        command += ['-threads', str(threads)]
+    for path in paths:
+        command += ['-i', path]
+    inputs = ''.join(f"[{index}:a]" for index in range(len(paths)))
+    command += [
+        '-filter_complex', f"{inputs}concat=n={len(paths)}:v=0:a=1[out]",
+        '-map', '[out]',
+        '-acodec', 'libmp3lame',
+        '-b:a', bitrate,
+        '-f', 'mp3',
+        output_path
+    ]
+    return command
+
+
+def _primed(first, stream):
+    """Re-attach an already read first chunk to its stream."""
+    yield first
+    yield from stream
+
+
+def open_segment_stream(video_url, start_time, duration, source_cache=None, stream_cache=None,
+                        **stream_options):
+    """Start streaming a segment, returning an iterator of MP3 bytes.
+
+    The first chunk is read before returning, so a source that fails to
+    start raises here (before any response is sent) rather than mid-stream.
+    A cached source track is tried first, then the remote stream.
+    """
+    video_id = video_id_from_url(video_url) if source_cache else None
+    cached = source_cache.get(video_id) if video_id else None
+    if cached:
+        stream = stream_segment(cached, start_time, duration, **stream_options)
+        try:
+            return _primed(next(stream), stream)
+        except (RuntimeError, StopIteration) as e:
+            logger.warning(f"Cached source stream failed, using remote stream: {str(e)}")
+
+    def attempt(remote):
+        stream = stream_segment(
+            remote['url'], start_time, duration,
+            http_headers=remote['http_headers'], **stream_options
+        )
+        try:
+            return _primed(next(stream), stream)
+        except StopIteration:
+            raise RuntimeError("ffmpeg produced no output")
+
+    chunks, remote = _with_remote_stream(video_url, stream_cache, attempt)
+    if (video_id and source_cache.should_cache(remote['duration'])
+            and source_cache.note_clip(video_id)):
+        source_cache.fill_async(video_id, video_url)
+    return chunks
+
+
+def video_id_from_url(video_url):
+    """Extract the YouTube video id from a watch or short URL."""
+    parsed = urlparse(video_url)
+    if parsed.hostname and parsed.hostname.endswith('youtu.be'):
+        return parsed.path.lstrip('/') or None
+    return parse_qs(parsed.query).get('v', [None])[0]
+
+
+def download_segment(video_url, start_time, duration, output_path, source_cache=None,
+                     stream_cache=None, **render_options):
+    """Fetch and encode only ``[start_time, start_time + duration)`` of a video.
+
+    With a ``source_cache``, clips from an already cached track are cut
+    locally. Otherwise the segment is cut from the remote stream and, once
+    more clips of a short enough video follow, the full track is cached in
+    the background for the rest of them. A ``stream_cache``
+    skips yt-dlp extraction for recently resolved videos. ``render_options``
+    are passed to ``render_segment``.
+    """
+    video_id = video_id_from_url(video_url) if source_cache else None
+    if video_id:
+        cached = source_cache.get(video_id)
+        if cached:
+            try:
+                logger.info(f"Cutting {duration:.2f}s at {start_time:.2f}s from cached source")
+                return render_segment(
+                    cached, start_time, duration, output_path, **render_options
+                )
+            except RuntimeError as e:
+                # Evicted or damaged between lookup and cut; use the stream
+                logger.warning(f"Cached source cut failed, using remote stream: {str(e)}")
+
+    def attempt(stream):
+        logger.info(
+            f"Cutting {duration:.2f}s at {start_time:.2f}s from remote stream "
+            f"({stream['ext']}, video length {stream['duration']}s)"
+        )
+        return render_segment(
+            stream['url'], start_time, duration, output_path,
+            http_headers=stream['http_headers'], **render_options
+        )
+
+    _, stream = _with_remote_stream(video_url, stream_cache, attempt)
+    if (video_id and source_cache.should_cache(stream['duration'])
+            and source_cache.note_clip(video_id)):
+        source_cache.fill_async(video_id, video_url)
+    return output_path
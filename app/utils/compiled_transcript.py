@@ -0,0 +1,188 @@
+"""Compiled transcript representation for fast phrase matching."""
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+
+def normalize_text(text):
+    """Lowercase and collapse whitespace the same way for text and queries."""
+    return ' '.join(text.lower().split())
+
+
+class CompiledTranscript:
+    """A transcript flattened into one normalized text buffer.
+
+    Segments are joined with single spaces, so phrases that span segment
+    boundaries are found by a single scan. ``offsets[i]`` is where segment
+    ``i`` starts in ``text``; ``starts`` and ``durations`` are parallel
+    arrays of segment timing. ``segments`` keeps the raw transcript.
+    """
+
+    __slots__ = ('segments', 'text', 'offsets', 'starts', 'durations')
+
+    def __init__(self, segments):
+        """Compile a raw ``[{'text', 'start', 'duration'}, ...]`` transcript."""
+        self.segments = segments
+        self.offsets = array('q')
+        self.starts = array('d')
+        self.durations = array('d')
+
+        parts = []
+        position = 0
+        for entry in segments:
+            normalized = normalize_text(entry['text'])
+            self.offsets.append(position)
+            self.starts.append(float(entry['start']))
+            self.durations.append(float(entry['duration']))
+            parts.append(normalized)
+            position += len(normalized) + 1
+        self.text = ' '.join(parts)
+
+    def __len__(self):
+        return len(self.segments)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the compiled buffers."""
+        return len(self.text) + len(self.offsets) * 24
+
+    def _segment_end(self, index):
+        """Offset just past the normalized text of segment ``index``."""
+        if index + 1 < len(self.offsets):
+            return self.offsets[index + 1] - 1
+        return len(self.text)
+
+    def segment_at(self, position):
+        """Map a text offset to the index of the segment containing it."""
+        return max(bisect_right(self.offsets, position) - 1, 0)
+
+    def time_at(self, position):
+        """Interpolate the playback time of a text offset within its segment."""
+        index = self.segment_at(position)
+        seg_start = self.offsets[index]
+        seg_length = max(self._segment_end(index) - seg_start, 1)
+        fraction = min(max((position - seg_start) / seg_length, 0.0), 1.0)
+        return self.starts[index] + self.durations[index] * fraction
+
+    def match_at(self, position, length):
+        """Build a match dict for a phrase found at ``position``."""
+        first = self.segment_at(position)
+        last = self.segment_at(position + max(length - 1, 0))
+        start = self.time_at(position)
+        end = self.starts[last] + self.durations[last]
+        return {
+            'text': ' '.join(
+                self.segments[i]['text'] for i in range(first, last + 1)
+            ),
+            'start': start,
+            'duration': max(end - start, 0.0),
+            'segment_start': self.starts[first]
+        }
+
+    def find_positions(self, query):
+        """Yield text offsets where a normalized query occurs.
+
+        Only the first occurrence per starting segment is reported, matching
+        the one-match-per-segment results of the original matcher.
+        """
+        if not query:
+            return
+        text = self.text
+        position = text.find(query)
+        while position != -1:
+            yield position
+            index = self.segment_at(position)
+            if index + 1 >= len(self.offsets):
+                break
+            position = text.find(query, self.offsets[index + 1])
+
+    def find(self, query):
+        """Find a word or phrase and return timestamped match dicts."""
+        query = normalize_text(query)
+        return [
+            self.match_at(position, len(query))
+            for position in self.find_positions(query)
+        ]
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton matching many phrases in one pass.
+
+    Phrases are normalized like transcript text, so one scan over a
+    CompiledTranscript's buffer finds every phrase, including those that
+    span segment boundaries.
+    """
+
+    def __init__(self, phrases):
+        """Build the automaton for a list of phrases."""
+        self.phrases = []
+        normalized = []
+        for phrase in phrases:
+            key = normalize_text(phrase)
+            if key and key not in normalized:
+                self.phrases.append(phrase)
+                normalized.append(key)
+        self._lengths = [len(key) for key in normalized]
+
+        # Trie: goto transitions, failure links and output phrase ids
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for phrase_id, key in enumerate(normalized):
+            state = 0
+            for char in key:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(phrase_id)
+
+        # Breadth-first failure links, merging outputs along them
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                if self._fail[next_state] == next_state:
+                    self._fail[next_state] = 0
+                self._out[next_state] = (
+                    self._out[next_state] + self._out[self._fail[next_state]]
+                )
+
+    def find_all(self, compiled):
+        """Match every phrase against a CompiledTranscript.
+
+        Returns ``{phrase: [match, ...]}`` for phrases with at least one
+        match, with one match per starting segment like ``find``.
+        """
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        seen = set()
+        results = {}
+        state = 0
+        for index, char in enumerate(compiled.text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for phrase_id in out[state]:
+                length = lengths[phrase_id]
+                position = index - length + 1
+                segment = compiled.segment_at(position)
+                if (phrase_id, segment) in seen:
+                    continue
+                seen.add((phrase_id, segment))
+                results.setdefault(self.phrases[phrase_id], []).append(
+                    (position, compiled.match_at(position, length))
+                )
+        # Outputs arrive in end-position order; report by start position
+        return {
+            phrase: [match for _, match in sorted(matches, key=lambda m: m[0])]
+            for phrase, matches in results.items()
+        }
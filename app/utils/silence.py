@@ -0,0 +1,63 @@
+"""Move clip boundaries to nearby quiet frames using short-time energy."""
+import numpy as np
+
+# 20 ms frames resolve gaps between words
+FRAME_SECONDS = 0.02
+
+# A frame counts as quiet when its RMS is within this fraction of the
+# quietest frame in the search window (relative to the window's range)
+QUIET_RATIO = 0.1
+
+# The quietest frame must be at most this fraction of the loudest one for
+# the window to contain a pause at all (about 6 dB of contrast)
+MAX_PAUSE_LEVEL = 0.5
+
+# Snapping may not shrink a clip below this fraction of its requested length
+MIN_LENGTH_RATIO = 0.5
+
+
+def frame_rms(samples, frame):
+    """RMS energy of consecutive ``frame``-sample frames (tail dropped)."""
+    count = len(samples) // frame
+    blocks = np.asarray(samples[:count * frame], dtype=np.float32).reshape(count, frame)
+    return np.sqrt(np.mean(blocks * blocks, axis=1))
+
+
+def quietest_near(rms, index, radius):
+    """Index of the quiet frame closest to ``index`` within ``radius`` frames.
+
+    Returns ``index`` unchanged when the window has no pause in it (all
+    silence, or sound without a clear dip in level).
+    """
+    index = min(max(index, 0), len(rms) - 1)
+    low = max(index - radius, 0)
+    window = rms[low:index + radius + 1]
+    floor, peak = float(window.min()), float(window.max())
+    if peak <= 1.0 or floor > peak * MAX_PAUSE_LEVEL:
+        return index
+    quiet = np.flatnonzero(window <= floor + QUIET_RATIO * (peak - floor)) + low
+    return int(quiet[np.argmin(np.abs(quiet - index))])
+
+
+def snap_boundaries(samples, sample_rate, start, end, tolerance, frame_seconds=FRAME_SECONDS):
+    """Snap ``[start, end)`` sample offsets to quiet frames.
+
+    ``samples`` is mono PCM covering the clip plus up to ``tolerance``
+    seconds either side. Each boundary moves at most ``tolerance`` seconds.
+    Returns the new ``(start, end)`` sample offsets.
+    """
+    frame = max(int(sample_rate * frame_seconds), 1)
+    rms = frame_rms(samples, frame)
+    if len(rms) == 0:
+        return start, end
+    radius = int(tolerance / frame_seconds)
+    new_start, new_end = start, end
+    start_frame = quietest_near(rms, start // frame, radius)
+    if start_frame != start // frame:
+        new_start = start_frame * frame
+    end_frame = quietest_near(rms, end // frame, radius)
+    if end_frame != end // frame:
+        new_end = min((end_frame + 1) * frame, len(samples))
+    if new_end - new_start < (end - start) * MIN_LENGTH_RATIO:
+        return start, end
+    return new_start, new_end
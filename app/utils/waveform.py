@@ -0,0 +1,149 @@
+"""Precomputed waveform peaks for clips and cached source tracks.
+
+Peaks files sit next to the audio they describe (``<audio>.peaks``) and
+use a small little-endian binary layout the front end reads directly::
+
+    magic     4s   b'WPK1'
+    bits      B    8 (int8 values)
+    channels  B    1 (mono mixdown)
+    reserved  H
+    rate      I    PCM sample rate the peaks were taken from
+    block     I    PCM samples per peak
+    count     I    number of peaks
+    data      int8 pairs [min0, max0, min1, max1, ...]
+"""
+import os
+import struct
+import logging
+import threading
+import subprocess
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PEAKS_SUFFIX = '.peaks'
+PEAKS_MAGIC = b'WPK1'
+PEAKS_HEADER = struct.Struct('<4sBBHIII')
+
+# 8 kHz mono is plenty for a drawing and keeps decoding cheap;
+# 80 samples per peak gives 100 peaks per second
+PEAKS_SAMPLE_RATE = 8000
+PEAKS_BLOCK = 80
+
+# Blocks decoded per read, so long sources are processed in bounded memory
+_BLOCKS_PER_READ = 4096
+
+
+def peaks_path(audio_path):
+    """Sidecar path holding the peaks of an audio file."""
+    return audio_path + PEAKS_SUFFIX
+
+
+def compute_peaks(samples, block=PEAKS_BLOCK):
+    """Min/max of every ``block`` int16 samples, scaled to int8.
+
+    Returns a flat int8 array of ``[min, max]`` pairs. A short final block
+    is padded with silence.
+    """
+    samples = np.asarray(samples, dtype=np.int16)
+    count = -(-len(samples) // block)
+    if count == 0:
+        return np.empty(0, dtype=np.int8)
+    padded = np.zeros(count * block, dtype=np.int16)
+    padded[:len(samples)] = samples
+    blocks = padded.reshape(count, block)
+    peaks = np.empty((count, 2), dtype=np.int8)
+    # Arithmetic shift keeps the sign: -32768..32767 -> -128..127
+    peaks[:, 0] = blocks.min(axis=1) >> 8
+    peaks[:, 1] = blocks.max(axis=1) >> 8
+    return peaks.ravel()
+
+
+def encode_peaks(peaks, sample_rate=PEAKS_SAMPLE_RATE, block=PEAKS_BLOCK):
+    """Serialize a flat int8 ``[min, max]`` array with its header."""
+    header = PEAKS_HEADER.pack(PEAKS_MAGIC, 8, 1, 0, sample_rate, block, len(peaks) // 2)
+    return header + np.asarray(peaks, dtype=np.int8).tobytes()
+
+
+def decode_peaks(data):
+    """Parse peaks bytes into ``(sample_rate, block, peaks)``."""
+    magic, bits, _, _, sample_rate, block, count = PEAKS_HEADER.unpack_from(data)
+    if magic != PEAKS_MAGIC or bits != 8:
+        raise ValueError("Not a peaks file")
+    peaks = np.frombuffer(data, dtype=np.int8, count=count * 2, offset=PEAKS_HEADER.size)
+    return sample_rate, block, peaks
+
+
+def slice_peaks(data, start_time, duration):
+    """Cut the peaks covering ``[start_time, start_time + duration)``."""
+    sample_rate, block, peaks = decode_peaks(data)
+    per_second = sample_rate / block
+    first = max(int(start_time * per_second), 0)
+    last = int(np.ceil((start_time + duration) * per_second))
+    return encode_peaks(peaks[first * 2:last * 2], sample_rate, block)
+
+
+def generate_peaks(audio_path, timeout=120, sample_rate=PEAKS_SAMPLE_RATE, block=PEAKS_BLOCK):
+    """Decode an audio file to mono PCM and write its peaks sidecar.
+
+    Decoding is streamed through numpy block by block; the sidecar is
+    written to a temporary name and renamed into place.
+    """
+    command = [
+        'ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error',
+        '-i', audio_path,
+        '-vn', '-ac', '1', '-ar', str(sample_rate),
+        '-f', 's16le', '-acodec', 'pcm_s16le', 'pipe:1'
+    ]
+    read_size = block * _BLOCKS_PER_READ * 2
+    parts = []
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # Kill a stuck decode; the read loop then sees EOF
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    try:
+        while True:
+            chunk = process.stdout.read(read_size)
+            if not chunk:
+                break
+            usable = len(chunk) - len(chunk) % 2
+            parts.append(compute_peaks(np.frombuffer(chunk[:usable], dtype='<i2'), block))
+        stderr = process.stderr.read()
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    if returncode != 0:
+        error = stderr.decode(errors='replace').strip()
+        raise RuntimeError(f"Peaks decode failed: {error or returncode}")
+
+    peaks = np.concatenate(parts) if parts else np.empty(0, dtype=np.int8)
+    path = peaks_path(audio_path)
+    temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.part"
+    try:
+        with open(temp_path, 'wb') as peaks_file:
+            peaks_file.write(encode_peaks(peaks, sample_rate, block))
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return path
+
+
+def ensure_peaks(audio_path, **options):
+    """Path of an audio file's peaks, generating them if missing."""
+    path = peaks_path(audio_path)
+    if os.path.exists(path):
+        return path
+    return generate_peaks(audio_path, **options)
+
+
+def try_generate_peaks(audio_path, **options):
+    """Generate peaks without failing the caller; returns the path or None."""
+    try:
+        return generate_peaks(audio_path, **options)
+    except Exception as e:
+        logger.warning(f"Could not generate peaks for {audio_path}: {str(e)}")
+        return None
@@ -1,9 +1,22 @@
 import os
 import logging
 from googleapiclient.discovery import build
-from youtube_transcript_api import YouTubeTranscriptApi
-import yt_dlp
+from youtube_transcript_api import (
+    YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound,
+    VideoUnavailable
+)
 import hashlib
+from flask import current_app, has_app_context
+from app.services.transcript_cache import transcript_cache, MISS
+from app.services.transcript_index import get_transcript_index
+from app.services.source_audio_cache import get_source_cache
+from app.services.stream_info_cache import stream_info_cache
+from app.services.clip_store import get_clip_store, clip_id
+from app.utils.compiled_transcript import CompiledTranscript
+from app.utils.waveform import try_generate_peaks
+from app.utils.audio_segment import (
+    download_segment, video_id_from_url, CLIP_BITRATE
+)
 
 # Set up logging
 logging.basicConfig(
@@ -41,43 +54,126 @@ def setup_youtube_api():
 
 def get_video_transcript(video_id):
     """Get transcript for a video."""
+    compiled = get_compiled_transcript(video_id)
+    return compiled.segments if compiled else None
+
+
+def get_compiled_transcript(video_id):
+    """Get a video's transcript in compiled form, ready for matching."""
     if not video_id:
         logger.error("No video ID provided")
         return None
+
+    cached = transcript_cache.get_compiled(video_id)
+    if cached is not MISS:
+        return cached
         
     try:
         transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
         if not transcript_list:
             logger.error(f"No transcript found for video {video_id}")
+            transcript_cache.set_missing(video_id)
             return None
-        return transcript_list
+        compiled = transcript_cache.set(video_id, transcript_list)
+        _index_transcript(video_id, transcript_list)
+        return compiled
+    except (TranscriptsDisabled, NoTranscriptFound, VideoUnavailable) as e:
+        logger.info(f"No transcript available for video {video_id}: {type(e).__name__}")
+        transcript_cache.set_missing(video_id)
+        return None
     except Exception as e:
         logger.error(f"Error getting transcript for video {video_id}: {e}")
         return None
 
 
+def _index_transcript(video_id, transcript):
+    """Add a freshly fetched transcript to the local index."""
+    index = get_transcript_index()
+    if index is None:
+        return
+    try:
+        index.add_transcript(video_id, transcript)
+    except Exception as e:
+        logger.error(f"Error indexing transcript for video {video_id}: {e}")
+
+
 def search_word_in_transcript(transcript, search_query):
-    """Search for word/phrase in transcript and return timestamps."""
+    """Search for word/phrase in transcript and return timestamps.
+
+    Accepts a raw transcript list or a CompiledTranscript. Phrases may span
+    segment boundaries; each match's start is interpolated within the
+    segment where the phrase begins.
+    """
     if not transcript or not search_query:
         logger.error("Missing transcript or search query")
         return []
         
-    matches = []
     try:
-        search_query = search_query.lower()
-        for entry in transcript:
-            if search_query in entry['text'].lower():
-                matches.append({
-                    'text': entry['text'],
-                    'start': entry['start'],
-                    'duration': entry['duration']
-                })
-        return matches
+        if not isinstance(transcript, CompiledTranscript):
+            transcript = CompiledTranscript(transcript)
+        return transcript.find(search_query)
     except Exception as e:
         logger.error(f"Error searching transcript: {e}")
         return []
 
 
+def clip_snap_tolerance():
+    """Configured boundary snapping distance in seconds (0 when off)."""
+    if not has_app_context():
+        return 0
+    return current_app.config.get('CLIP_SNAP_TOLERANCE', 0)
+
+
+def clip_output_path(video_url, start_time, duration):
+    """Where a clip is stored: ``(store name or None, path)``."""
+    store = get_clip_store()
+    if store:
+        video_id = video_id_from_url(video_url) or video_url
+        params = {'bitrate': CLIP_BITRATE}
+        snap = clip_snap_tolerance()
+        if snap:
+            # Snapped and exact cuts of the same timestamps are different clips
+            params['snap'] = snap
+        name = f"{clip_id(video_id, start_time, duration, **params)}.mp3"
+        return name, store.path_for(name)
+    output_dir = 'clips'
+    os.makedirs(output_dir, exist_ok=True)
+    clip_hash = hashlib.md5(
+        f"{video_url}:{start_time}:{duration}".encode()
+    ).hexdigest()
+    return None, os.path.join(output_dir, f"{clip_hash}.mp3")
+
+
+def render_clip(video_url, start_time, duration, **render_options):
+    """Cut a clip into the clip store, reusing an existing one.
+
+    Raises on failure so callers can retry; see ``download_audio_clip``
+    for the variant that returns None instead.
+    """
+    name, output_path = clip_output_path(video_url, start_time, duration)
+    if os.path.exists(output_path):
+        logger.info(f"Using cached clip: {output_path}")
+        return output_path
+
+    render_options.setdefault('snap_tolerance', clip_snap_tolerance())
+    download_segment(
+        video_url, start_time, duration, output_path,
+        source_cache=get_source_cache(),
+        stream_cache=stream_info_cache,
+        **render_options
+    )
+    if not os.path.exists(output_path):
+        raise RuntimeError("Download completed but file not found")
+
+    try_generate_peaks(output_path)
+    if name:
+        get_clip_store().add(
+            name, video_id_from_url(video_url) or '', start_time, duration,
+            bitrate=CLIP_BITRATE, snap=render_options['snap_tolerance']
+        )
+    return output_path
+
+
 def download_audio_clip(video_url, start_time, duration=30):
     """Download a portion of a video's audio."""
     if not video_url or start_time < 0 or duration <= 0:
@@ -85,37 +181,7 @@ def download_audio_clip(video_url, start_time, duration=30):
         return None
         
     try:
-        output_dir = 'clips'
-        os.makedirs(output_dir, exist_ok=True)
-        
-        clip_id = hashlib.md5(
-            f"{video_url}:{start_time}:{duration}".encode()
-        ).hexdigest()
-        output_path = os.path.join(output_dir, f"{clip_id}.mp3")
-        
-        if os.path.exists(output_path):
-            logger.info(f"Using cached clip: {output_path}")
-            return output_path
-            
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'outtmpl': output_path,
-            'quiet': True
-        }
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([video_url])
-            
-        if not os.path.exists(output_path):
-            logger.error("Download completed but file not found")
-            return None
-            
-        return output_path
+        return render_clip(video_url, start_time, duration)
     except Exception as e:
         logger.error(f"Error downloading clip: {e}")
         return None
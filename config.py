@@ -143,6 +143,28 @@ class Config:
             logger.info(f"Creating upload folder: {self.UPLOAD_FOLDER}")
             os.makedirs(self.UPLOAD_FOLDER, exist_ok=True)
 
+        # Clip store: metadata index, total size (bytes), age limit (seconds)
+        # and free disk space the evictor keeps available (bytes)
+        self.CLIP_INDEX_PATH = os.getenv(
+            'CLIP_INDEX_PATH',
+            os.path.join(os.getcwd(), 'instance', 'clips.db')
+        )
+        self.CLIP_STORE_MAX_BYTES = int(
+            os.getenv('CLIP_STORE_MAX_BYTES', 5 * 1024 * 1024 * 1024)
+        )
+        self.CLIP_MAX_AGE = int(os.getenv('CLIP_MAX_AGE', 7 * 86400))
+        self.CLIP_STORE_MIN_FREE_BYTES = int(
+            os.getenv('CLIP_STORE_MIN_FREE_BYTES', 1024 * 1024 * 1024)
+        )
+
+        # Clip downloads: browser cache lifetime for content-addressed clips
+        # (seconds) and optional proxy offload ('x-accel' for nginx with an
+        # internal location at CLIP_ACCEL_PREFIX aliased to UPLOAD_FOLDER,
+        # or 'x-sendfile')
+        self.CLIP_CACHE_MAX_AGE = int(os.getenv('CLIP_CACHE_MAX_AGE', 365 * 86400))
+        self.CLIP_SENDFILE_MODE = os.getenv('CLIP_SENDFILE_MODE') or None
+        self.CLIP_ACCEL_PREFIX = os.getenv('CLIP_ACCEL_PREFIX', '/protected-clips/')
+
         # Session configuration
         self.SESSION_COOKIE_DOMAIN = os.getenv('SESSION_COOKIE_DOMAIN')
         if self.SESSION_COOKIE_DOMAIN:
@@ -157,11 +179,139 @@ class Config:
             os.makedirs(self.AI_MODEL_CACHE)
         
         # Add to Config class
-        self.AI_MODEL_VERSION = "distilbert-base-cased-distilled-squad-v1.1"
+        self.AI_MODEL_VERSION = os.getenv(
+            'AI_MODEL_VERSION', "distilbert-base-cased-distilled-squad-v1.1"
+        )
+
+        # Shared QA model server (one process per host, loaded lazily)
+        self.QA_SOCKET_PATH = os.getenv('QA_SOCKET_PATH', '/tmp/audiosnipt-qa.sock')
         
         # Admin token for monitoring
         self.ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', 'your-secure-admin-token')
-        
+
+        # Search pipeline: transcript fan-out pool and deadlines (seconds)
+        self.SEARCH_FANOUT_WORKERS = int(os.getenv('SEARCH_FANOUT_WORKERS', 10))
+        self.SEARCH_VIDEO_TIMEOUT = float(os.getenv('SEARCH_VIDEO_TIMEOUT', 8))
+        self.SEARCH_REQUEST_TIMEOUT = float(os.getenv('SEARCH_REQUEST_TIMEOUT', 15))
+
+        # Usage counter circuit breaker: consecutive Redis failures before
+        # counting locally, and the first/longest probe delay (seconds)
+        self.CACHE_BREAKER_FAILURES = int(os.getenv('CACHE_BREAKER_FAILURES', 3))
+        self.CACHE_BREAKER_BASE_DELAY = float(os.getenv('CACHE_BREAKER_BASE_DELAY', 1))
+        self.CACHE_BREAKER_MAX_DELAY = float(os.getenv('CACHE_BREAKER_MAX_DELAY', 60))
+
+        # Proxies in front of the app that append to X-Forwarded-For; the
+        # client IP is the entry the outermost of them added
+        self.TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', 1))
+
+        # Token-bucket rate limits per IP and per subscription token: refill
+        # rate (tokens per second) and burst size for each route group
+        self.RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+        self.RATE_LIMIT_SEARCH_RATE = float(os.getenv('RATE_LIMIT_SEARCH_RATE', 0.2))
+        self.RATE_LIMIT_SEARCH_BURST = int(os.getenv('RATE_LIMIT_SEARCH_BURST', 10))
+        self.RATE_LIMIT_CLIP_RATE = float(os.getenv('RATE_LIMIT_CLIP_RATE', 0.5))
+        self.RATE_LIMIT_CLIP_BURST = int(os.getenv('RATE_LIMIT_CLIP_BURST', 20))
+        self.RATE_LIMIT_QUOTA_RATE = float(os.getenv('RATE_LIMIT_QUOTA_RATE', 2))
+        self.RATE_LIMIT_QUOTA_BURST = int(os.getenv('RATE_LIMIT_QUOTA_BURST', 30))
+        self.RATE_LIMIT_WAVEFORM_RATE = float(os.getenv('RATE_LIMIT_WAVEFORM_RATE', 5))
+        self.RATE_LIMIT_WAVEFORM_BURST = int(os.getenv('RATE_LIMIT_WAVEFORM_BURST', 60))
+
+        # Search events: Redis stream cap, and how often and in what batch
+        # sizes the scheduler writes them to the search_logs table
+        self.SEARCH_EVENTS_MAXLEN = int(os.getenv('SEARCH_EVENTS_MAXLEN', 100000))
+        self.SEARCH_EVENTS_BATCH = int(os.getenv('SEARCH_EVENTS_BATCH', 500))
+        self.SEARCH_EVENTS_MAX_BATCHES = int(os.getenv('SEARCH_EVENTS_MAX_BATCHES', 20))
+        self.SEARCH_EVENTS_INTERVAL = int(os.getenv('SEARCH_EVENTS_INTERVAL', 30))
+
+        # How long browsers may reuse a GET /check_searches answer (seconds)
+        self.QUOTA_STATUS_MAX_AGE = int(os.getenv('QUOTA_STATUS_MAX_AGE', 5))
+
+        # Multi-phrase batch search
+        self.SEARCH_BATCH_MAX_PHRASES = int(os.getenv('SEARCH_BATCH_MAX_PHRASES', 20))
+
+        # Background search jobs: worker threads per process, result TTL (seconds)
+        self.SEARCH_JOB_WORKERS = int(os.getenv('SEARCH_JOB_WORKERS', 4))
+        self.SEARCH_JOB_TTL = int(os.getenv('SEARCH_JOB_TTL', 3600))
+
+        # Transcript cache: in-process LRU budget (bytes) and Redis TTLs (seconds)
+        self.TRANSCRIPT_CACHE_LOCAL_BYTES = int(
+            os.getenv('TRANSCRIPT_CACHE_LOCAL_BYTES', 64 * 1024 * 1024)
+        )
+        self.TRANSCRIPT_CACHE_TTL = int(os.getenv('TRANSCRIPT_CACHE_TTL', 7 * 86400))
+        self.TRANSCRIPT_CACHE_NEGATIVE_TTL = int(
+            os.getenv('TRANSCRIPT_CACHE_NEGATIVE_TTL', 6 * 3600)
+        )
+
+        # Local transcript index (SQLite FTS5) queried before YouTube
+        self.TRANSCRIPT_INDEX_PATH = os.getenv(
+            'TRANSCRIPT_INDEX_PATH',
+            os.path.join(os.getcwd(), 'instance', 'transcripts.db')
+        )
+        # Local matches needed to skip YouTube: a full search page (10 videos)
+        self.TRANSCRIPT_INDEX_MIN_RESULTS = int(os.getenv('TRANSCRIPT_INDEX_MIN_RESULTS', 10))
+        # Only videos YouTube listed for the person this recently (seconds)
+        # are served locally; older listings go back to YouTube
+        self.TRANSCRIPT_INDEX_MAX_AGE = int(os.getenv('TRANSCRIPT_INDEX_MAX_AGE', 6 * 3600))
+
+        # YouTube search cache (seconds) and daily Data API quota budget
+        self.YOUTUBE_SEARCH_CACHE_TTL = int(os.getenv('YOUTUBE_SEARCH_CACHE_TTL', 6 * 3600))
+        self.YOUTUBE_SEARCH_STALE_TTL = int(os.getenv('YOUTUBE_SEARCH_STALE_TTL', 7 * 86400))
+        self.YOUTUBE_SEARCH_COST = 100
+        self.YOUTUBE_DAILY_QUOTA = int(os.getenv('YOUTUBE_DAILY_QUOTA', 10000))
+        self.YOUTUBE_QUOTA_RESERVE = float(os.getenv('YOUTUBE_QUOTA_RESERVE', 0.9))
+
+        # Clip rendering jobs: worker threads (one ffmpeg each) per process,
+        # in-flight limit per process, retries, per-attempt timeout (seconds)
+        # and ffmpeg CPU limits
+        self.CLIP_WORKERS = int(os.getenv('CLIP_WORKERS', 2))
+        self.CLIP_QUEUE_MAX = int(os.getenv('CLIP_QUEUE_MAX', 20))
+        self.CLIP_JOB_RETRIES = int(os.getenv('CLIP_JOB_RETRIES', 2))
+        self.CLIP_JOB_TIMEOUT = int(os.getenv('CLIP_JOB_TIMEOUT', 120))
+        self.CLIP_JOB_TTL = int(os.getenv('CLIP_JOB_TTL', 3600))
+        self.CLIP_FFMPEG_THREADS = int(os.getenv('CLIP_FFMPEG_THREADS', 1))
+        self.CLIP_FFMPEG_NICE = int(os.getenv('CLIP_FFMPEG_NICE', 10))
+
+        # Move rendered clip cut points to the nearest quiet frame within this
+        # many seconds of the transcript timestamps (0 disables)
+        self.CLIP_SNAP_TOLERANCE = float(os.getenv('CLIP_SNAP_TOLERANCE', 0))
+
+        # Batch clip export: clips per request, render threads per request
+        # and the longest clip (seconds) a batch may ask for
+        self.CLIP_BATCH_MAX = int(os.getenv('CLIP_BATCH_MAX', 50))
+        self.CLIP_BATCH_WORKERS = int(os.getenv('CLIP_BATCH_WORKERS', 4))
+        self.CLIP_MAX_DURATION = float(os.getenv('CLIP_MAX_DURATION', 60))
+
+        # Clip delivery: 'job' renders in the background pool, 'stream' pipes
+        # ffmpeg output straight to the client (tee'd into the clip store
+        # when CLIP_STREAM_CACHE is on)
+        self.CLIP_DELIVERY = os.getenv('CLIP_DELIVERY', 'job')
+        self.CLIP_STREAM_CACHE = os.getenv('CLIP_STREAM_CACHE', 'true').lower() == 'true'
+
+        # yt-dlp: persistent cache of player signature code shared by all
+        # workers, and the longest a resolved stream URL is reused (seconds)
+        self.YTDLP_CACHE_DIR = os.getenv(
+            'YTDLP_CACHE_DIR',
+            os.path.join(os.getcwd(), 'instance', 'yt-dlp-cache')
+        )
+        self.YTDLP_STREAM_CACHE_TTL = int(os.getenv('YTDLP_STREAM_CACHE_TTL', 4 * 3600))
+
+        # Source audio cache for follow-up clips: disk budget (bytes, 0 disables)
+        # and the longest video (seconds) worth downloading in full
+        self.SOURCE_CACHE_DIR = os.getenv(
+            'SOURCE_CACHE_DIR',
+            os.path.join(os.getcwd(), 'instance', 'source_audio')
+        )
+        self.SOURCE_CACHE_MAX_BYTES = int(
+            os.getenv('SOURCE_CACHE_MAX_BYTES', 2 * 1024 * 1024 * 1024)
+        )
+        self.SOURCE_CACHE_MAX_DURATION = int(os.getenv('SOURCE_CACHE_MAX_DURATION', 3600))
+        self.SOURCE_CACHE_FILL_WORKERS = int(os.getenv('SOURCE_CACHE_FILL_WORKERS', 2))
+        self.SOURCE_CACHE_FILL_QUEUE = int(os.getenv('SOURCE_CACHE_FILL_QUEUE', 8))
+        # Remote cuts of one video within the window (seconds) before its
+        # full track is cached; batch exports of several clips fill at once
+        self.SOURCE_CACHE_FILL_AFTER = int(os.getenv('SOURCE_CACHE_FILL_AFTER', 2))
+        self.SOURCE_CACHE_FILL_WINDOW = int(os.getenv('SOURCE_CACHE_FILL_WINDOW', 600))
+
         logger.info("Configuration loaded successfully")
 
     def _validate_config(self):
@@ -116,6 +116,18 @@ def pre_exec(server):
 def when_ready(server):
     """Called just after the server is started."""
     server.log.info("Server is ready. Spawning workers...")
+    if os.getenv('QA_WARMUP', 'false').lower() == 'true':
+        import threading
+        from app.services.qa_client import QAClient
+
+        def warm_up():
+            try:
+                QAClient.from_env().warmup()
+                server.log.info("QA model server warmed up")
+            except Exception as e:
+                server.log.error(f"QA model warm-up failed: {e}")
+
+        threading.Thread(target=warm_up, daemon=True).start()
 
 
 def worker_int(worker):
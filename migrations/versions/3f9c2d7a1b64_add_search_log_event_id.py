@@ -0,0 +1,28 @@
+"""Add event_id to search_logs for de-duplicating streamed events
+
+Revision ID: 3f9c2d7a1b64
+Revises: 849583a778c1
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2d7a1b64'
+down_revision = '849583a778c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('search_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('event_id', sa.String(length=32), nullable=True))
+        batch_op.create_unique_constraint('uq_search_logs_event_id', ['event_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('search_logs', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_search_logs_event_id', type_='unique')
+        batch_op.drop_column('event_id')
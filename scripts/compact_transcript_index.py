@@ -0,0 +1,59 @@
+"""Compact the local transcript index and print its size."""
+import os
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+sys.path.append(project_root)
+
+from dotenv import load_dotenv
+from app.services.transcript_index import TranscriptIndex
+
+
+def main():
+    """Prune stale videos, optimize the FTS index and vacuum the database."""
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--path',
+        default=os.getenv(
+            'TRANSCRIPT_INDEX_PATH',
+            os.path.join(project_root, 'instance', 'transcripts.db')
+        ),
+        help='Path to the transcript index database'
+    )
+    parser.add_argument(
+        '--max-age-days',
+        type=int,
+        default=90,
+        help='Remove videos not seen in a search for this many days (0 keeps all)'
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        logger.error(f"Transcript index not found: {args.path}")
+        sys.exit(1)
+
+    index = TranscriptIndex(args.path)
+    before = index.stats()
+    removed = index.compact(max_age_days=args.max_age_days)
+    after = index.stats()
+
+    logger.info(f"Removed {removed} stale videos")
+    logger.info(
+        f"Videos: {before['videos']} -> {after['videos']}, "
+        f"segments: {before['segments']} -> {after['segments']}, "
+        f"size: {before['file_bytes']} -> {after['file_bytes']} bytes"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Tests for segment-only audio extraction."""
+import shutil
+from app.utils.audio_segment import build_segment_command, resource_prefix
+
+
+def _arg(command, flag, occurrence=0):
+    """Return the value following the nth occurrence of a flag."""
+    indexes = [i for i, arg in enumerate(command) if arg == flag]
+    return command[indexes[occurrence] + 1]
+
+
+def test_remote_seek_uses_pre_roll():
+    """Test remote sources seek before the input and trim the pre-roll after."""
+    command = build_segment_command(
+        'https://example.com/audio', 125.0, 4.0, 'out.mp3',
+        http_headers={'User-Agent': 'test'}, pre_roll=2.0
+    )
+    assert _arg(command, '-ss', 0) == '123.000'
+    assert _arg(command, '-ss', 1) == '2.000'
+    assert _arg(command, '-t') == '4.000'
+    assert command.index('-ss') < command.index('-i')
+    assert _arg(command, '-headers') == 'User-Agent: test\r\n'
+    assert '-reconnect' in command
+    assert command[-1] == 'out.mp3'
+
+
+def test_seek_near_start_is_clamped():
+    """Test the input seek never goes before the start of the stream."""
+    command = build_segment_command('source.m4a', 0.5, 1.0, 'out.mp3', pre_roll=2.0)
+    assert _arg(command, '-ss', 0) == '0.000'
+    assert _arg(command, '-ss', 1) == '0.500'
+    assert '-reconnect' not in command
+    assert '-headers' not in command
+
+
+def test_resource_limits_are_a_command_prefix():
+    """Test priority and CPU limits wrap the command instead of a preexec_fn."""
+    prefix = resource_prefix(niceness=10, cpu_seconds=120)
+    if shutil.which('nice'):
+        assert prefix[:3] == ['nice', '-n', '10']
+    if shutil.which('prlimit'):
+        assert prefix[-2:] == ['--cpu=120:125', '--']
+    assert resource_prefix() == []
@@ -0,0 +1,39 @@
+"""Tests for the cache circuit breaker."""
+import time
+from app.services.circuit_breaker import CircuitBreaker
+
+
+def test_opens_after_threshold_and_backs_off():
+    """Test the breaker opens, probes through one caller and doubles its delay."""
+    breaker = CircuitBreaker('test', failure_threshold=2, base_delay=0.05, max_delay=0.1)
+    breaker.record_failure()
+    assert breaker.allow() is True
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow() is False
+
+    time.sleep(0.06)
+    assert breaker.allow() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.stats()['retry_delay'] == 0.1
+
+    time.sleep(0.11)
+    assert breaker.allow() is True
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()['retry_delay'] == 0.05
+
+
+def test_background_probe_closes_breaker():
+    """Test a failing probe keeps it open and a healthy one closes it."""
+    breaker = CircuitBreaker('test', failure_threshold=1, base_delay=0.02, max_delay=0.04)
+    outcomes = iter([False, True])
+    breaker.record_failure(probe=lambda: next(outcomes))
+    assert breaker.allow() is False
+    deadline = time.monotonic() + 2
+    while breaker.state != CircuitBreaker.CLOSED and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()['trips'] == 1
@@ -0,0 +1,98 @@
+"""Tests for route rate limiting."""
+import pytest
+from flask import Flask
+from app.services import rate_limiter as limiter_module
+from app.services.rate_limiter import rate_limited
+
+
+def _limited_app(monkeypatch, allowed, retry_after):
+    """A one-route app whose limiter answers as given and records its keys."""
+    calls = []
+
+    def hit(scope, identities, cost=1):
+        calls.append((scope, identities, cost))
+        return allowed, retry_after
+
+    monkeypatch.setattr(limiter_module.rate_limiter, 'hit', hit)
+    app = Flask(__name__)
+    app.config.update(RATE_LIMIT_ENABLED=True, TRUSTED_PROXY_COUNT=1)
+
+    @app.route('/limited', methods=['POST'])
+    @rate_limited('search', cost=2)
+    def limited():
+        return 'ok'
+
+    return app.test_client(), calls
+
+
+def test_rejected_requests_get_429_with_retry_after(monkeypatch):
+    """Test an exhausted bucket answers 429 and says when to retry."""
+    client, calls = _limited_app(monkeypatch, False, 7)
+    response = client.post('/limited', json={'token': 'abc'})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '7'
+    assert calls == [('search', ['ip:127.0.0.1', 'token:abc'], 2)]
+
+
+def test_ip_comes_from_trusted_proxy_hop(monkeypatch):
+    """Test client-supplied X-Forwarded-For entries cannot pick the bucket."""
+    client, calls = _limited_app(monkeypatch, True, 0)
+    for spoofed in ('1.1.1.1', '2.2.2.2'):
+        response = client.post(
+            '/limited', json={}, headers={'X-Forwarded-For': f'{spoofed}, 203.0.113.9'}
+        )
+        assert response.status_code == 200
+    assert [identities for _, identities, _ in calls] == [['ip:203.0.113.9']] * 2
+
+
+@pytest.fixture
+def redis_limiter(monkeypatch):
+    """The real bucket script on an in-memory Redis with Lua support."""
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    client = fakeredis.FakeRedis()
+    monkeypatch.setattr(limiter_module, 'get_redis_client', lambda: client)
+    app = Flask(__name__)
+    app.config.update(RATE_LIMIT_SEARCH_RATE=0.5, RATE_LIMIT_SEARCH_BURST=2)
+    with app.app_context():
+        yield limiter_module.RateLimiter(), client
+
+
+def _rewind(client, key, seconds):
+    """Pretend a bucket was last touched ``seconds`` earlier."""
+    client.hset(key, 'ts', float(client.hget(key, 'ts')) - seconds)
+
+
+def test_bucket_script_refills_and_reports_retry(redis_limiter):
+    """Test the burst is spent, retry_ms is the refill wait, and tokens come back."""
+    limiter, client = redis_limiter
+    assert limiter.hit('search', ['ip:1.2.3.4']) == (True, 0)
+    assert limiter.hit('search', ['ip:1.2.3.4']) == (True, 0)
+
+    script = limiter._script(client)
+    keys = [limiter.METRICS_KEY, 'ratelimit:search:ip:1.2.3.4']
+    allowed, retry_ms = script(keys=keys, args=['search', 1, 0.5, 2])
+    # One token at half a token per second
+    assert allowed == 0 and 1900 < retry_ms <= 2000
+
+    _rewind(client, keys[1], 2)
+    assert limiter.hit('search', ['ip:1.2.3.4']) == (True, 0)
+    assert client.hgetall(limiter.METRICS_KEY) == {b'search:allowed': b'3', b'search:rejected': b'1'}
+
+
+def test_bucket_script_takes_from_all_buckets_or_none(redis_limiter):
+    """Test a request refused by one bucket leaves the others untouched."""
+    limiter, client = redis_limiter
+    limiter.hit('search', ['token:abc'], cost=2)
+    before = client.hget('ratelimit:search:token:abc', 'tokens')
+
+    allowed, retry_after = limiter.hit('search', ['ip:1.2.3.4', 'token:abc'], cost=2)
+    assert not allowed and retry_after == 4
+    assert not client.exists('ratelimit:search:ip:1.2.3.4')
+    assert client.hget('ratelimit:search:token:abc', 'tokens') == before
+
+    # Both buckets have two tokens again, so both are charged together
+    _rewind(client, 'ratelimit:search:token:abc', 4)
+    assert limiter.hit('search', ['ip:1.2.3.4', 'token:abc'], cost=2) == (True, 0)
+    assert float(client.hget('ratelimit:search:ip:1.2.3.4', 'tokens')) == 0
+    assert float(client.hget('ratelimit:search:token:abc', 'tokens')) < 1
@@ -0,0 +1,69 @@
+"""Tests for streamed search events."""
+import pytest
+from app.extensions import db
+from app.models import SearchLog
+from app.services import search_events
+
+
+class FakeStreamClient:
+    """Single-stream, single-group stand-in for the Redis stream commands."""
+
+    def __init__(self):
+        self.entries = []
+        self.delivered = 0
+        self.pending = {}
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        entry_id = f"{len(self.entries) + 1}-0".encode()
+        self.entries.append((entry_id, {k.encode(): v.encode() for k, v in fields.items()}))
+        return entry_id
+
+    def xgroup_create(self, key, group, id='0', mkstream=False):
+        pass
+
+    def xautoclaim(self, key, group, consumer, min_idle_time, start_id='0-0', count=None):
+        return [b'0-0', list(self.pending.items()), []]
+
+    def xreadgroup(self, group, consumer, streams, count=None):
+        batch = self.entries[self.delivered:self.delivered + count]
+        self.delivered += len(batch)
+        self.pending.update(batch)
+        return [[search_events.STREAM_KEY.encode(), batch]] if batch else []
+
+    def xack(self, key, group, *ids):
+        for entry_id in ids:
+            self.pending.pop(entry_id, None)
+        return len(ids)
+
+
+@pytest.fixture
+def stream(app, monkeypatch):
+    client = FakeStreamClient()
+    monkeypatch.setattr(search_events, 'get_redis_client', lambda: client)
+    with app.app_context():
+        yield client
+
+
+def test_events_are_stored_in_batches(stream, app, monkeypatch):
+    """Test queued events reach search_logs and are acknowledged."""
+    monkeypatch.setitem(app.config, 'SEARCH_EVENTS_BATCH', 2)
+    for word in ('hello', 'world', 'again'):
+        assert search_events.record_search_event(f"someone: {word}", True, ip_address='1.2.3.4')
+    search_events.record_search_event('someone: oops', False, error='quota')
+
+    assert search_events.drain_search_events() == 4
+    assert stream.pending == {}
+    failed = db.session.query(SearchLog).filter_by(success=False).one()
+    assert (failed.query, failed.error) == ('someone: oops', 'quota')
+    assert db.session.query(SearchLog).filter(SearchLog.event_id.isnot(None)).count() == 4
+
+
+def test_redelivered_events_are_not_duplicated(stream, app):
+    """Test a batch delivered twice is stored once."""
+    search_events.record_search_event('someone: hello', True)
+    batch = list(stream.entries)
+    assert search_events.drain_search_events() == 1
+    # Same entries claimed again after an ack was lost
+    stream.pending.update(batch)
+    search_events.drain_search_events()
+    assert db.session.query(SearchLog).filter_by(query='someone: hello').count() == 1
@@ -0,0 +1,29 @@
+"""Tests for silence-aware clip boundary snapping."""
+import numpy as np
+from app.utils.silence import snap_boundaries
+
+RATE = 1000
+
+
+def _speech(seconds, gaps):
+    """Loud noise with silent ``(start, end)`` gaps, in seconds."""
+    samples = np.random.default_rng(0).integers(-8000, 8000, int(seconds * RATE)).astype(np.int16)
+    for start, end in gaps:
+        samples[int(start * RATE):int(end * RATE)] = 0
+    return samples
+
+
+def test_boundaries_move_to_nearest_gap_within_tolerance():
+    """Test both cut points land in the nearest quiet stretch."""
+    samples = _speech(6.0, [(0.7, 0.8), (4.3, 4.4)])
+    start, end = snap_boundaries(samples, RATE, 1 * RATE, 4 * RATE, tolerance=0.5)
+    assert 0.7 * RATE <= start < 0.8 * RATE
+    assert 4.3 * RATE < end <= 4.4 * RATE
+
+
+def test_boundaries_stay_without_quiet_frames_in_reach():
+    """Test a cut stays put when no gap is within tolerance."""
+    samples = _speech(6.0, [(0.1, 0.2)])
+    assert snap_boundaries(samples, RATE, 2 * RATE, 4 * RATE, tolerance=0.3) == (2 * RATE, 4 * RATE)
+    flat = np.zeros(6 * RATE, dtype=np.int16)
+    assert snap_boundaries(flat, RATE, 2 * RATE, 4 * RATE, tolerance=0.3) == (2 * RATE, 4 * RATE)
@@ -0,0 +1,59 @@
+"""Tests for the source audio cache."""
+import os
+import time
+import pytest
+from app.services import source_audio_cache
+from app.services.source_audio_cache import SourceAudioCache, source_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SourceAudioCache(str(tmp_path), max_bytes=100, fill_after=2, fill_window=600)
+
+
+def add_entry(cache, video_id, size, created_at):
+    """Insert a cached track as a finished fill would."""
+    key = source_key(video_id, cache.audio_format)
+    os.makedirs(cache._shard_dir(key), exist_ok=True)
+    path = os.path.join(cache._shard_dir(key), f"{key}.m4a")
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    with cache._connect() as conn:
+        conn.execute(
+            "INSERT INTO sources (key, video_id, format, path, size, created_at, last_access, hits) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+            (key, video_id, cache.audio_format, path, size, created_at, created_at)
+        )
+    return key, path
+
+
+def test_fill_waits_for_follow_up_clips(cache, monkeypatch):
+    """Test a video is worth filling only after repeated cuts in the window."""
+    now = time.time()
+    monkeypatch.setattr(source_audio_cache.time, 'time', lambda: now)
+    assert not cache.note_clip('aaaaaaaaaaa')
+    assert cache.note_clip('aaaaaaaaaaa')
+    assert not cache.note_clip('bbbbbbbbbbb')
+
+    # The first cut has left the window by the time the next one comes
+    now += 601
+    assert not cache.note_clip('bbbbbbbbbbb')
+
+
+def test_evict_skips_new_and_filling_tracks(cache):
+    """Test eviction leaves fresh fills and tracks whose lock is held."""
+    old = time.time() - 3600
+    _, oldest = add_entry(cache, 'aaaaaaaaaaa', 60, old)
+    locked_key, locked = add_entry(cache, 'bbbbbbbbbbb', 60, old + 1)
+    _, fresh = add_entry(cache, 'ccccccccccc', 60, time.time())
+
+    lock_file = cache._lock(os.path.join(cache._shard_dir(locked_key), f"{locked_key}.lock"))
+    try:
+        assert cache.evict() == 1
+    finally:
+        lock_file.close()
+
+    assert not os.path.exists(oldest)
+    assert os.path.exists(locked)
+    assert os.path.exists(fresh)
+    assert cache.get('aaaaaaaaaaa') is None
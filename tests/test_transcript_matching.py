@@ -0,0 +1,80 @@
+"""Tests for compiled transcript phrase matching."""
+import time
+import pytest
+from app.utils.compiled_transcript import CompiledTranscript, PhraseMatcher
+from app.utils.youtube_search_and_clip import search_word_in_transcript
+from app.services.transcript_index import TranscriptIndex
+
+
+@pytest.fixture
+def transcript():
+    """Create a short raw transcript."""
+    return [
+        {'text': 'We are going', 'start': 0.0, 'duration': 2.0},
+        {'text': 'to  MARS soon', 'start': 2.0, 'duration': 3.0},
+        {'text': 'mars mars', 'start': 5.0, 'duration': 1.0}
+    ]
+
+
+def test_normalized_buffer_and_offsets(transcript):
+    """Test segments are joined into one normalized buffer."""
+    compiled = CompiledTranscript(transcript)
+    assert compiled.text == 'we are going to mars soon mars mars'
+    assert list(compiled.offsets) == [0, 13, 26]
+    assert compiled.segment_at(14) == 1
+    assert compiled.segment_at(26) == 2
+
+
+def test_phrase_across_segment_boundary(transcript):
+    """Test a phrase spanning two segments is found."""
+    matches = search_word_in_transcript(transcript, 'Going  to mars')
+    assert len(matches) == 1
+    match = matches[0]
+    assert match['text'] == 'We are going to  MARS soon'
+    assert match['segment_start'] == 0.0
+    # "going" starts 7 characters into a 12 character segment
+    assert match['start'] == pytest.approx(2.0 * 7 / 12)
+    assert match['start'] + match['duration'] == pytest.approx(5.0)
+
+
+def test_one_match_per_segment(transcript):
+    """Test repeated words in one segment produce a single match."""
+    matches = CompiledTranscript(transcript).find('mars')
+    assert [m['segment_start'] for m in matches] == [2.0, 5.0]
+
+
+def test_no_match(transcript):
+    """Test missing phrases and empty queries return no matches."""
+    compiled = CompiledTranscript(transcript)
+    assert compiled.find('venus') == []
+    assert search_word_in_transcript(compiled, '') == []
+
+
+def test_phrase_matcher_agrees_with_find(transcript):
+    """Test batch matching returns the same matches as single-phrase find."""
+    compiled = CompiledTranscript(transcript)
+    phrases = ['mars', 'going to', 'soon mars', 'venus', 'MARS']
+    results = PhraseMatcher(phrases).find_all(compiled)
+    assert set(results) == {'mars', 'going to', 'soon mars'}
+    for phrase, matches in results.items():
+        assert matches == compiled.find(phrase)
+
+
+def test_local_index_matches_like_search(transcript, tmp_path):
+    """Test the local index returns the compiled matcher's matches, if fresh."""
+    index = TranscriptIndex(str(tmp_path / 'transcripts.db'))
+    item = {
+        'id': {'videoId': 'vid1'},
+        'snippet': {'title': 'T', 'description': 'D', 'thumbnails': {'default': {'url': 'U'}}}
+    }
+    index.add_videos('Some  Person', [item])
+    index.add_transcript('vid1', transcript)
+
+    videos = index.search('some person', 'mars')
+    assert [video['id'] for video in videos] == ['vid1']
+    assert videos[0]['matches'] == search_word_in_transcript(transcript, 'mars')
+    # "going" and "to mars" are indexed as separate segments
+    spanning = index.search('some person', 'going  to ma')
+    assert spanning[0]['matches'] == search_word_in_transcript(transcript, 'going to ma')
+    assert index.search('some person', 'going venus') == []
+    assert index.search('some person', 'mars', seen_since=time.time() + 60) == []
@@ -0,0 +1,33 @@
+"""Tests for atomic search usage counters."""
+import threading
+from app.services.usage_counters import UsageCounters
+
+
+def test_concurrent_charges_never_exceed_limit():
+    """Test concurrent check-and-charge admits exactly the limit."""
+    counters = UsageCounters()
+    results = []
+
+    def charge():
+        results.append(counters.charge('free_searches:test', 1, 5, 60)['allowed'])
+
+    threads = [threading.Thread(target=charge) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 5
+    status = counters.peek('free_searches:test', 5, 60)
+    assert (status['used'], status['remaining']) == (5, 0)
+    assert status['expires'] is not None
+
+
+def test_refund_and_reset():
+    """Test refunds never go below zero and reset forgets the counter."""
+    counters = UsageCounters()
+    assert counters.charge('token_usage:t', 3, 10, 60)['used'] == 3
+    assert counters.charge('token_usage:t', 8, 10, 60)['allowed'] is False
+    assert counters.refund('token_usage:t', 5, 10, 60)['used'] == 0
+    counters.reset('token_usage:t')
+    assert counters.exists('token_usage:t') is False
+    assert counters.peek('token_usage:t', 10, 60)['expires'] is None
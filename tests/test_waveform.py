@@ -0,0 +1,26 @@
+"""Tests for waveform peak generation."""
+import numpy as np
+from app.utils.waveform import compute_peaks, encode_peaks, decode_peaks, slice_peaks
+
+
+def test_peaks_are_block_min_max_scaled_to_int8():
+    """Test each block yields its min and max, scaled from int16 to int8."""
+    samples = np.array([0, 32767, -32768, 256, -512, 1024, 7], dtype=np.int16)
+    peaks = compute_peaks(samples, block=3)
+    assert peaks.dtype == np.int8
+    # Last block is padded with silence
+    assert peaks.tolist() == [-128, 127, -2, 4, 0, 0]
+    assert len(compute_peaks(np.empty(0, dtype=np.int16))) == 0
+
+
+def test_encoded_peaks_round_trip_and_slice():
+    """Test the binary layout round-trips and slices by time."""
+    peaks = compute_peaks(np.arange(-400, 400, dtype=np.int16) * 40, block=8)
+    data = encode_peaks(peaks, sample_rate=80, block=8)
+    sample_rate, block, decoded = decode_peaks(data)
+    assert (sample_rate, block) == (80, 8)
+    assert decoded.tolist() == peaks.tolist()
+
+    # 10 peaks per second: one second starting at 2s is peaks 20..29
+    _, _, window = decode_peaks(slice_peaks(data, 2.0, 1.0))
+    assert window.tolist() == peaks[40:60].tolist()